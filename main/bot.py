@@ -1,33 +1,43 @@
+import collections
 import datetime
 import itertools
 import logging
 import operator
 import os
-import re
 from pathlib import Path
 
 import aiohttp
-import aiosqlite
 import discord
 
 from ext.category import Category
 from discord.ext import commands, ipc
 
 from utils.cache import CacheManager
+from utils.database import Database
+from utils.migrations import migrate
+from utils.flusher import Flusher
+from utils.fuzzy import FuzzyIndex
+from utils.prefix import PrefixResolver
 from utils.subclasses import customContext
+from utils.tracks import TrackCache
 from utils.useful import (Cooldown, ListCall, call, currencyData,
                           print_exception)
-from utils.json_loader import read_json
+from utils.json_loader import Settings
 
 to_call = ListCall()
 
 
 class GrootBot(commands.Bot):
     def __init__(self, **kwargs):
+        self.command_index = FuzzyIndex()
         super().__init__(self.get_prefix, **kwargs)
         self.icons = {}
         self.non_sync = ["music", "core"]
         self.data = currencyData(self)
+        self.flusher = Flusher(self)
+        self.prefixes = PrefixResolver(self)
+        self.gate_stats = collections.Counter()
+        self.typing_stats = collections.defaultdict(collections.Counter)
         self.token = kwargs.pop("token", None)
         self.session = aiohttp.ClientSession()
         self.maintenance = False
@@ -37,12 +47,30 @@ class GrootBot(commands.Bot):
         )
         self.categories = {}
         self.config = dict(os.environ)
+        self.settings = Settings()
         self.testers = [396805720353275924]
+        self.track_cache = TrackCache(
+            self,
+            maxsize=int(self.config.get("TRACK_CACHE_SIZE", 2000)),
+            ttl=int(self.config.get("TRACK_CACHE_TTL", 6 * 60 * 60)),
+            persist=self.config.get("TRACK_CACHE_PERSIST", "true").lower() == "true",
+        )
 
     async def after_db(self):
         """Runs after the db is connected"""
         await to_call.call(self)
 
+    async def close(self):
+        """Writes the pending currency changes and the music players before closing, jsk shutdown and SIGTERM end up here."""
+        if not self.is_closed():
+            try:
+                await self.flusher.flush()
+                if music := self.get_cog("Music"):
+                    await music.save_players()
+            except Exception as e:
+                logging.warning(f"Saving before closing failed: {e!r}")
+        await super().close()
+
     def add_command(self, command):
         """Overwrite add_command to add a default cooldown to every command"""
         super().add_command(command)
@@ -54,6 +82,18 @@ class GrootBot(commands.Bot):
         ):
             command.checks.append(Cooldown(1, 3, 1, 1, commands.BucketType.user))
 
+        for name in (command.name, *command.aliases):
+            self.command_index.add(name, command)
+
+    def remove_command(self, name):
+        """Overwrite remove_command to keep the command index in sync"""
+        command = super().remove_command(name)
+        if command is not None:
+            names = (command.name, *command.aliases) if name == command.name else (name,)
+            for alias in names:
+                self.command_index.remove(alias)
+        return command
+
     @property
     def cwd(self):
         return str(Path(__file__).parents[0])
@@ -61,7 +101,7 @@ class GrootBot(commands.Bot):
     @property
     def owner(self):
         """Gets the discord.User of the owner"""
-        return self.get_user(396805720353275924)
+        return self.get_user(self.owner_id)
 
     @property
     def log_channel(self):
@@ -139,33 +179,37 @@ class GrootBot(commands.Bot):
         data = await cur.fetchall()
         ## BETA
         self.cache["disabled_commands"] = {
-            cmd: [r[1] for r in _group]
+            cmd: {r[1] for r in _group}
             for cmd, _group in itertools.groupby(data, key=operator.itemgetter(0))
         }
         # self.cached_disabled = {
         #   cmd: [r[1] for r in _group]
         #   for cmd, _group in itertools.groupby(data, key=operator.itemgetter(0))
         #}
-        self.cache["users"] = {}
+        self.cache.namespace(
+            "users",
+            maxsize=int(self.config.get("USERS_CACHE_SIZE", 10000)),
+            max_age=int(self.config.get("USERS_CACHE_AGE", 60 * 60)),
+            loader=self.data.fetch_account,
+            on_evict=self.flusher.evict
+        )
+        self.cache.namespace(
+            "inventories",
+            maxsize=int(self.config.get("INVENTORY_CACHE_SIZE", 10000)),
+            max_age=int(self.config.get("INVENTORY_CACHE_AGE", 60 * 60)),
+            loader=self.data.inventory.fetch,
+        )
+        await self.data.inventory.load_items()
+        await self.prefixes.load()
+        await self.track_cache.prune()
 
     async def get_prefix(self, message):
         """Handles custom prefixes, this function is invoked every time process_command method is invoke thus returning
         the appropriate prefixes depending on the guild."""
-        if message.author == self.owner:
-            return ["g.", "", self.cache["prefix"].get(getattr(message.guild, "id", message.author.id))]
-        query = "SELECT prefix FROM guild_config WHERE guild_id=?"
-        snowflake_id = getattr(message.guild, "id", message.author.id)
-        self.cache.setdefault("prefix", {})
-        if not (prefix := self.cache["prefix"].get(snowflake_id)):
-            cur = await self.db.execute(query, (snowflake_id,))
-            data = await cur.fetchone()
-            data = data if data else ["g."]
-            prefix = self.cache["prefix"].setdefault(snowflake_id, data[0])
-
-        comp = re.compile(f"^({re.escape(prefix)}).*", flags=re.I)
-        match = comp.match(message.content)
-        if match is not None:
-            return match.group(1)
+        prefixes = self.prefixes.get(getattr(message.guild, "id", message.author.id))
+        prefix = prefixes.match(message.content) or prefixes.first
+        if message.author.id == self.owner_id:
+            return [prefix, "g.", ""]
         return prefix
 
     def add_cog(self, cog: commands.Cog, cat_name: str = "Unlisted"):
@@ -191,43 +235,69 @@ class GrootBot(commands.Bot):
         context = await super().get_context(message, cls=customContext)
         return context
 
+    def gate(self, message):
+        """Checks that only need the message, so most messages are dropped before a context is built.
+        Returns the name of the check that rejected the message, or None if it may be a command."""
+        if message.author.bot:
+            return "bot"
+        if message.author.id == self.owner_id:
+            return None
+
+        blacklisted = self.cache["blacklisted_users"]
+        guild_id = getattr(message.guild, "id", None)
+        if message.author.id in blacklisted or guild_id in blacklisted:
+            return "blacklisted"
+
+        if self.prefixes.match(guild_id or message.author.id, message.content) is None:
+            return "no_prefix"
+        return None
+
     async def process_commands(self, message):
         """Override process_commands to check, and call typing every invoke"""
-        if message.author.bot:
+        if (stage := self.gate(message)) is not None:
+            self.gate_stats[stage] += 1
             return
 
-        # Checks etc for blacklist ...
         ctx = await self.get_context(message)
-        if message.author.id == self.owner.id:
+        if message.author.id == self.owner_id:
+            self.gate_stats["passed"] += 1
             await self.invoke(ctx)
             return
 
-        if self.maintenance and ctx.valid:
+        if not ctx.valid:
+            self.gate_stats["not_found"] += 1
+            return
+
+        if self.maintenance:
+            self.gate_stats["maintenance"] += 1
             await message.channel.send("Bot is in maintenance. Please try again later.")
             return
 
-        if (message.author.id in self.cache["blacklisted_users"] or getattr(message.guild, "id", None) in self.cache["blacklisted_users"]):
+        disabled = self.cache["disabled_commands"].get(ctx.command.name)
+        if disabled and (message.channel.id in disabled or getattr(message.guild, "id", None) in disabled):
+            self.gate_stats["disabled"] += 1
             return
 
-        if ctx.valid and ctx.command.name in self.cache["disabled_commands"].keys():
-            if (
-                ctx.valid
-                and message.channel.id in self.cache["disabled_commands"][ctx.command.name]
-                or ctx.valid
-                and message.guild.id in self.cache["disabled_commands"][ctx.command.name]
-            ):
-                return
-        
-        # Trigger typing every invoke
-        if ctx.valid and getattr(ctx.cog, "qualified_name", None) != "Jishaku":
-            await ctx.trigger_typing()
-        await self.invoke(ctx)
+        self.gate_stats["passed"] += 1
+        # Only type if the command takes a while to respond
+        if getattr(ctx.cog, "qualified_name", None) != "Jishaku":
+            ctx.defer_typing(float(self.config.get("TYPING_DELAY", 1)))
+        try:
+            await self.invoke(ctx)
+        finally:
+            ctx.cancel_typing()
+            stats = self.typing_stats[ctx.command.qualified_name]
+            stats["invokes"] += 1
+            stats["typed"] += ctx.typed
 
     def starter(self):
         """Starts the bot properly"""
         try:
             db = self.loop.run_until_complete(
-                aiosqlite.connect(f"{self.cwd}/data/main.sqlite3")
+                Database.connect(
+                    f"{self.cwd}/data/main.sqlite3",
+                    readers=int(self.config.get("DB_READERS", 4))
+                )
             )
         except Exception as e:
             print_exception("Could not connect to database:", e)
@@ -235,6 +305,7 @@ class GrootBot(commands.Bot):
         else:
             self.launch_time = datetime.datetime.utcnow()
             self.db = db
+            self.loop.run_until_complete(migrate(db, f"{self.cwd}/data/sql/migrations"))
             self.loop.run_until_complete(self.after_db())
             try:
                 self.ipc.start()
@@ -248,7 +319,7 @@ class GrootBot(commands.Bot):
         print(f"Logged in as {self.user}")
 
         # Edit restart message
-        data = read_json('config')
+        data = self.settings.get('config')
         channel = self.get_channel(data['messages']['lastChannel'])
         msg = await channel.fetch_message(data['messages']['lastMessage'])
         if msg is not None:
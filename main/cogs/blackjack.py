@@ -24,7 +24,7 @@ class Blackjack(commands.Cog):
             raise commands.BadArgument(
                 f"{ctx.author.mention} You are too rich to gamble!"
             )
-        boost = round(self.bot.cache["users"][ctx.author.id]["boost"], 2)
+        boost = round(await self.data.get_data(ctx.author.id, mode="boost"), 2)
         if wallet == 0:
             raise commands.BadArgument(
                 f"{ctx.author.mention} You have no coins to gamble with."
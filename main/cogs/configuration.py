@@ -4,6 +4,7 @@ import discord
 
 from discord.ext import commands
 from discord.ext.commands import guild_only, has_guild_permissions
+from utils.prefix import MAX_PREFIXES
 from utils.useful import RoleConvert
 
 
@@ -66,19 +67,40 @@ class Configuration(commands.Cog):
         await self.bot.db.execute(query, (ctx.guild.id, role.id, role.id))
         await ctx.send(f"The role required for giveaways is now set to **{role.name}**")
 
-    @config.command(name="prefix", usage="<prefix>")
+    @config.group(name="prefix", usage="<prefix>", invoke_without_command=True, case_insensitive=True)
     async def _setprefix(self, ctx: customContext, *, prefix: str):
         """
         Changes the bot prefix for this guild.\n
         Only applicable if you are in a guild.
+        Use `config prefix add` to have more than one prefix.
         """
-        query = "INSERT INTO guild_config (guild_id, prefix) VALUES (?, ?) ON CONFLICT (guild_id) DO UPDATE SET prefix = ?"
-        await self.bot.db.execute(query, (ctx.guild.id, prefix, prefix))
-        self.bot.cache["prefix"][ctx.guild.id] = prefix
+        await self.bot.prefixes.set(ctx.guild.id, [prefix])
         await ctx.send(
             f"The prefix has been set to `{prefix}`. To change the prefix again, use `{prefix}config prefix <prefix>`"
         )
 
+    @_setprefix.command(name="add", usage="<prefix>")
+    async def _addprefix(self, ctx: customContext, *, prefix: str):
+        """Adds another prefix for this guild."""
+        prefixes = self.bot.prefixes.get(ctx.guild.id).prefixes
+        if prefix in prefixes:
+            raise commands.BadArgument(f"`{prefix}` is already a prefix.")
+        if len(prefixes) >= MAX_PREFIXES:
+            raise commands.BadArgument(f"A server can't have more than {MAX_PREFIXES} prefixes.")
+
+        await self.bot.prefixes.set(ctx.guild.id, [*prefixes, prefix])
+        await ctx.send(f"{self.bot.icons['greenTick']} Added `{prefix}` to the prefixes.")
+
+    @_setprefix.command(name="remove", usage="<prefix>")
+    async def _removeprefix(self, ctx: customContext, *, prefix: str):
+        """Removes one of the prefixes of this guild, removing the last one goes back to the default."""
+        prefixes = self.bot.prefixes.get(ctx.guild.id).prefixes
+        if prefix not in prefixes:
+            raise commands.BadArgument(f"`{prefix}` is not a prefix.")
+
+        await self.bot.prefixes.set(ctx.guild.id, [p for p in prefixes if p != prefix])
+        await ctx.send(f"{self.bot.icons['greenTick']} Removed `{prefix}` from the prefixes.")
+
     @commands.command(
         name="disable",
         brief="Disables a command for a server or channel",
@@ -111,10 +133,7 @@ class Configuration(commands.Cog):
                 f"{self.bot.icons['redTick']} That command is already disabled{txt}!"
             )
         else:
-            try:
-                self.bot.cache["disabled_commands"][command].append(snowflake_id.id)
-            except KeyError:
-                self.bot.cache["disabled_commands"][command] = [ctx.guild.id]
+            self.bot.cache["disabled_commands"].setdefault(command, set()).add(snowflake_id.id)
             await ctx.send(f"{self.bot.icons['greenTick']} Disabled command `{command}`{txt}")
 
     @commands.command(
@@ -153,7 +172,7 @@ class Configuration(commands.Cog):
             )
         else:
             query = "DELETE FROM disabled_commands WHERE snowflake_id = ? AND command_name = ?"
-            self.bot.cache["disabled_commands"][command].remove(snowflake_id.id)
+            self.bot.cache["disabled_commands"].get(command, set()).discard(snowflake_id.id)
             await self.bot.db.execute(query, (snowflake_id.id, command))
             await ctx.send(f"{self.bot.icons['greenTick']} Enabled command `{command}`{txt}")
 
@@ -172,14 +191,16 @@ class Configuration(commands.Cog):
             return
         
         queries = [
-            "DELETE FROM currency_data WHERE user_id = ?"
+            "DELETE FROM currency_data WHERE user_id = ?",
             "DELETE FROM user_Inventory WHERE user_id = ?"
         ]
 
         for query in queries:
             await self.bot.db.execute(query, (ctx.author.id, ))
+        self.bot.data.inventory.forget(ctx.author.id)
         
-        del self.bot.cache['users']
+        self.bot.cache['users'].pop(ctx.author.id, None)
+        self.bot.flusher.forget_user(ctx.author.id)
         await ctx.send(f"{self.bot.greenTick} Removed all your data")
         
 
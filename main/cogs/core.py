@@ -1,6 +1,7 @@
 from utils._type import *
 
 import datetime as dt
+import logging
 import traceback
 import discord
 import humanize
@@ -8,15 +9,27 @@ import re
 
 from discord.ext import commands, tasks
 from utils.useful import Embed, Cooldown, send_traceback
-from utils.json_loader import read_json
+from utils.publisher import Publisher
 
 class Core(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.cache = {}
-        self.cache_usage = {}
+        self.publishers = {
+            "presence": Publisher("presence"),
+            "status": Publisher("status board"),
+        }
+        self.status_message = None
         self.loops.start()
         self.update_status.start()
+        self.bot.settings.listen("config", self.on_config_change)
+
+    def cog_unload(self):
+        self.bot.settings.remove_listener("config", self.on_config_change)
+
+    def on_config_change(self, data):
+        # `dev status` shows up on the status board right away instead of on the next refresh
+        if self.bot.is_ready():
+            self.bot.loop.create_task(self.update_status())
 
     async def expand_tb(self, ctx: customContext, error, msg):
         await msg.add_reaction(self.bot.icons['plus'])
@@ -138,7 +151,8 @@ class Core(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, message):
         if re.fullmatch("<@(!)?812395879146717214>", message.content):
-            await message.channel.send(f"My prefix is `{await self.bot.get_prefix(message)}`")
+            prefixes = self.bot.prefixes.get(getattr(message.guild, "id", message.author.id)).prefixes
+            await message.channel.send(f"My prefix is {', '.join(f'`{p}`' for p in prefixes)}")
             return
 
     @commands.Cog.listener()
@@ -153,62 +167,31 @@ class Core(commands.Cog):
         query_c = "DELETE FROM guilds WHERE guild_id = ?"
         await self.bot.db.execute(query_c, (guild.id,))
 
+    @commands.Cog.listener("on_ready")
+    @commands.Cog.listener("on_resumed")
+    async def on_reconnect(self):
+        # a new gateway session starts without the presence we set
+        self.publishers["presence"].reset()
+
     @commands.Cog.listener()
     async def on_command(self, ctx: customContext):
-        try:
-            self.cache[str(ctx.author.id)] += 1
-            self.cache_usage[str(ctx.command.name)] += 1
-        except KeyError:
-            self.cache[str(ctx.author.id)] = 1
-            self.cache_usage[str(ctx.command.name)] = 1
+        self.bot.flusher.count_command(ctx.author.id, ctx.command.name)
 
     @tasks.loop(minutes=1)
     async def loops(self):
 
-        await self.bot.change_presence(
-            activity=discord.Activity(
-                type=0,
-                name=f"g.help | {len(self.bot.users)} users | {len(self.bot.guilds)} guilds.",
-            )
+        activity = discord.Activity(
+            type=0,
+            name=f"g.help | {len(self.bot.users)} users | {len(self.bot.guilds)} guilds.",
         )
+        await self.publishers["presence"].publish(activity.to_dict(), lambda: self.bot.change_presence(activity=activity))
 
-        for item in self.cache:
-            query_user_data = """
-                              INSERT INTO users_data (user_id, commands_ran) 
-                              VALUES ((?), ?)
-                              ON CONFLICT(user_id) DO UPDATE SET commands_ran = commands_ran+?
-                              """
-            await self.bot.db.execute(
-                query_user_data, (int(item), self.cache[item], self.cache[item])
-            )
-        self.cache = {}
-
-        for item in self.cache_usage:
-            query = """
-                    INSERT INTO usage (command, counter) 
-                    VALUES ((?), ?) 
-                    ON CONFLICT(command) DO UPDATE SET counter = counter+?
-                    """
-
-            await self.bot.db.execute(
-                query, (str(item), self.cache_usage[item], self.cache_usage[item])
-            )
-
-        self.cache_usage = {}
-        for user in self.bot.cache["users"]:
-            query = "UPDATE currency_data SET wallet = ?, bank = ?, max_bank = ?, boost = ?, exp = ?, lvl = ? WHERE user_id = ?"
-            await self.bot.db.execute(
-                query,
-                (
-                    self.bot.cache["users"][user]["wallet"],
-                    self.bot.cache["users"][user]["bank"],
-                    self.bot.cache["users"][user]["max_bank"],
-                    round(self.bot.cache["users"][user]["boost"], 2),
-                    self.bot.cache["users"][user]["exp"],
-                    self.bot.cache["users"][user]["lvl"],
-                    user,
-                ),
-            )
+        self.bot.cache.expire()
+        try:
+            await self.bot.flusher.flush()
+        except Exception:
+            # the failed snapshot is put back, the next iteration retries it
+            logging.exception("Flushing the currency data failed")
 
 
     @loops.before_loop
@@ -217,25 +200,21 @@ class Core(commands.Cog):
 
     @tasks.loop(seconds=10)
     async def update_status(self):
-        status = read_json('config')
+        status = self.bot.settings.get('config')
         
         groot_status = f"{self.bot.icons[status['status'].get('groot', 'offline')]} {str.title(status['status'].get('groot', 'offline'))}"
         message = f"**BOT STATUS** \n\n {groot_status} | Groot\n\nRefreshes every second"
     
-        em = Embed(
-                description=message,
-                timestamp=dt.datetime.utcnow()
-            )
-        em.set_footer(text="Last updated at")
-    
-        channel = self.bot.get_channel(846450009721012294)
-        message = await channel.fetch_message(851052521757081630)
-        try:
-            await message.edit(embed=em)
-        except Exception as error:
-            await send_traceback(
-                        self.bot.log_channel, 10, type(error), error, error.__traceback__
-                    )
+        em = Embed(description=message)
+        em.set_footer(text="Last changed at")
+        # the timestamp isn't part of the hash, so an unchanged status doesn't cause an edit
+        payload = em.to_dict()
+        em.timestamp = dt.datetime.utcnow()
+
+        if self.status_message is None:
+            channel = self.bot.get_channel(846450009721012294)
+            self.status_message = channel.get_partial_message(851052521757081630)
+        await self.publishers["status"].publish(payload, lambda: self.status_message.edit(embed=em))
 
     @update_status.before_loop
     async def before_status(self):
@@ -22,29 +22,11 @@ class Currency(commands.Cog):
         self.levels.start()
 
     async def cog_before_invoke(self, ctx: customContext):
-        query = """
-                DELETE FROM user_Inventory
-                WHERE amount = 0
-                """
-        await self.bot.db.execute(query)
         if await self.data.create_account(ctx.author.id) is True:
             ctx.bucket.reset()
             raise commands.BadArgument(
                 "Seems like you are new! I created an account for you."
             )
-        if ctx.author.id not in self.bot.cache["users"]:
-            query = "SELECT * FROM currency_data WHERE user_id = ?"
-            cur = await self.bot.db.execute(query, (ctx.author.id,))
-            r = await cur.fetchone()
-            self.bot.cache["users"][ctx.author.id] = {
-                "wallet": r[1],
-                "bank": r[2],
-                "max_bank": r[3],
-                "boost": r[4],
-                "exp": r[5],
-                "lvl": r[6],
-                "prestige": r[7],
-            }
 
     async def cog_after_invoke(self, ctx: customContext):
         exp = random.randint(0, 3)
@@ -55,6 +37,10 @@ class Currency(commands.Cog):
         except KeyError:
             self.cache[ctx.author.id] = exp
 
+    def did_you_mean(self, item, item_ids=None):
+        names = self.data.inventory.suggest(item, item_ids)
+        return f" Did you mean {', '.join(f'`{name}`' for name in names)}?" if names else ""
+
     @commands.command(
         name="profile", aliases=["lvl"], brief="Shows your stats and level"
     )
@@ -62,7 +48,7 @@ class Currency(commands.Cog):
     async def _profile(self, ctx: customContext, member: discord.Member = None):
         """Shows your statistics and experience/level total and the commands issued."""
         member = member if member is not None else ctx.author
-        if member.id not in self.bot.cache["users"]:
+        if await self.data.get_account(member.id) is None:
             return await ctx.maybe_reply(
                 f"{self.bot.icons['redTick']} That user does not have an account yet!"
             )
@@ -127,7 +113,7 @@ class Currency(commands.Cog):
     async def _balance(self, ctx: customContext, member: discord.Member = None):
         """Shows your balance (wallet, bank and net worth)"""
         member = member if member is not None else ctx.author
-        if member.id not in self.bot.cache["users"]:
+        if await self.data.get_account(member.id) is None:
             return await ctx.maybe_reply(
                 f"{self.bot.icons['redTick']} That user does not have an account yet!"
             )
@@ -161,18 +147,12 @@ class Currency(commands.Cog):
         Displays amount and item name of everything you own.
         """
 
-        query = """
-                SELECT item_info.item_name, user_Inventory.amount
-                FROM   user_Inventory
-                INNER JOIN item_info
-                USING(item_id)
-                WHERE  user_Inventory.user_id = ?
-                """
-        cur = await self.bot.db.execute(query, (ctx.author.id,))
-        data = await cur.fetchall()
+        items = self.data.inventory.items
+        data = await self.data.inventory.get(ctx.author.id)
         inventory = ""
-        for item, amount in data:
-            inventory += f"`{amount:,}` **{item}**\n"
+        for item_id, amount in data.items():
+            if item_id in items:
+                inventory += f"`{amount:,}` **{items[item_id].name}**\n"
         em = Embed(
             description=inventory if inventory else "No items to see here..."
         ).set_author(name=f"{ctx.author.display_name}'s inventory")
@@ -185,34 +165,17 @@ class Currency(commands.Cog):
         This command is used to buy something from the shop.
         Amount is an optional argument, which defaults to one.
         """
-        item = item.lower()
-        price = """
-                SELECT item_price, item_name
-                FROM item_info
-                WHERE lower(item_name) LIKE ?
-                """
-        cur = await self.bot.db.execute(price, (f"%{item}%",))
-        data = await cur.fetchone()
+        data = self.data.inventory.match_item(item)
         if not data:
-            raise commands.BadArgument("This item doesn't exist!")
-        if await self.data.get_data(ctx.author.id) < data[0] * amount:
+            raise commands.BadArgument("This item doesn't exist!" + self.did_you_mean(item))
+        if await self.data.get_data(ctx.author.id) < data.price * amount:
             raise commands.BadArgument(
                 f"{ctx.author.mention} You do not have enough money for this purchase!"
             )
-        await self.data.update_data(ctx.author.id, -data[0] * amount)
-        item = data[1]
-        query = """
-                INSERT INTO user_Inventory
-                VALUES (?, 
-                (SELECT item_id 
-                 FROM   item_info 
-                 WHERE  item_name = ?), 
-                ?)
-                ON CONFLICT(user_id, item_id) DO UPDATE SET amount = amount + ?
-                """
-        await self.bot.db.execute(query, (ctx.author.id, item, amount, amount))
+        await self.data.update_data(ctx.author.id, -data.price * amount)
+        await self.data.inventory.add(ctx.author.id, data.id, amount)
         em = Embed(
-            description=f"Successfully bought `{amount}` `{item}` for **⛻{data[0]*amount:,}**"
+            description=f"Successfully bought `{amount}` `{data.name}` for **⛻{data.price*amount:,}**"
         )
         em.set_author(name="Successful purchase", icon_url=ctx.author.avatar_url)
         return await ctx.send(embed=em)
@@ -220,63 +183,38 @@ class Currency(commands.Cog):
     @commands.command(name="shop", brief="Get something from the shop!")
     async def _shop(self, ctx: customContext, item=None):
         if item:
-            query = """
-                    SELECT item_name, item_description, item_price
-                    FROM item_info
-                    WHERE lower(item_name) = ?
-                    """
-            cur = await self.bot.db.execute(query, (item.lower(),))
-            data = await cur.fetchone()
+            data = self.data.inventory.get_item(item) or self.data.inventory.find_item(item)
             if not data:
                 raise commands.BadArgument(
                     f"{item} is not an recognized item. Please check your spelling."
                 )
-            em = Embed(title=data[0], description=data[1])
+            em = Embed(title=data.name, description=data.description)
             em.add_field(
                 name="Value",
-                value=f"**BUY**: ⛻{data[2]:,}\n**SELL**: ⛻{round(data[2]*0.25):,}",
+                value=f"**BUY**: ⛻{data.price:,}\n**SELL**: ⛻{round(data.price*0.25):,}",
             )
             return await ctx.send(embed=em)
         else:
-            query = """
-                    SELECT item_name, item_description, item_price
-                    FROM item_info
-                    """
-            cur = await self.bot.db.execute(query)
-            data = await cur.fetchall()
             items = ""
-            for i in data:
-                items += f"**{i[0]}** — ⛻{i[2]:,}\n{i[1]}\n\n"
+            for i in self.data.inventory.items.values():
+                items += f"**{i.name}** — ⛻{i.price:,}\n{i.description}\n\n"
             await ctx.send(embed=Embed(title="Shop items", description=items))
 
     @commands.command(name="sell", brief="Sell something you own")
     @commands.check(Cooldown(1, 10, 1, 5, commands.BucketType.user))
     async def _sell(self, ctx: customContext, amount: typing.Optional[int] = 1, *, item):
-        item = item.lower()
-        query = """
-                SELECT item_info.item_price, user_Inventory.amount, item_info.item_name, item_info.item_id
-                FROM   user_Inventory
-                INNER JOIN item_info
-                USING(item_id)
-                WHERE  user_Inventory.user_id = ? AND lower(item_info.item_name) LIKE ?
-                """
-        cur = await self.bot.db.execute(query, (ctx.author.id, f"%{item.lower()}%"))
-        data = await cur.fetchone()
-        data = data if data else (0, 0)
-        if amount > data[1]:
+        inventory = await self.data.inventory.get(ctx.author.id)
+        data = self.data.inventory.match_item(item, inventory)
+        owned = inventory.get(data.id, 0) if data else 0
+        if data is None or amount > owned:
             raise commands.BadArgument(
-                f"{ctx.author.mention} You do not have `{amount:,}` {item} to sell! You only have `{data[1]}`"
+                f"{ctx.author.mention} You do not have `{amount:,}` {item} to sell! You only have `{owned}`"
+                + (self.did_you_mean(item, inventory) if data is None else "")
             )
-        item = data[2]
-        query = """
-                UPDATE user_Inventory 
-                SET amount = amount - ? 
-                WHERE user_id = ? AND item_id = ?
-                """
-        await self.bot.db.execute(query, (amount, ctx.author.id, data[3]))
-        await self.data.update_data(ctx.author.id, round(data[0] * amount * 0.25))
+        await self.data.inventory.remove(ctx.author.id, data.id, amount)
+        await self.data.update_data(ctx.author.id, round(data.price * amount * 0.25))
         em = Embed(
-            description=f"Successfully sold `{amount}` `{item}` for **⛻{int(data[0]*amount*0.25):,}**"
+            description=f"Successfully sold `{amount}` `{data.name}` for **⛻{int(data.price*amount*0.25):,}**"
         )
         em.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar_url)
         return await ctx.send(embed=em)
@@ -347,7 +285,7 @@ class Currency(commands.Cog):
             raise commands.BadArgument(
                 f"{self.bot.icons['redTick']} You need a `Fishing Rod` to use `fish`!"
             )
-        boost = self.bot.cache["users"][ctx.author.id]["boost"]
+        boost = await self.data.get_data(ctx.author.id, mode="boost")
         times_caught = random.randint(1, 3)
 
         fish_dict = {
@@ -406,7 +344,7 @@ class Currency(commands.Cog):
     @commands.check(Cooldown(1, 20, 1, 10, commands.BucketType.user))
     async def _hunt(self, ctx: customContext, info=None):
         """Hunt for animals that you automatically sell for cash!"""
-        boost = self.bot.cache["users"][ctx.author.id]["boost"]
+        boost = await self.data.get_data(ctx.author.id, mode="boost")
         times_caught = random.randint(1, 3)
         animals_dict = {
             "🦌 Deer": 1200,
@@ -481,7 +419,7 @@ class Currency(commands.Cog):
                 f"{self.bot.icons['redTick']} Amount must be a positive number!"
             )
 
-        if member.id not in self.bot.cache["users"]:
+        if await self.data.get_account(member.id) is None:
             return await ctx.maybe_reply(
                 f"{self.bot.icons['redTick']} That user does not have an account yet!"
             )
@@ -511,7 +449,7 @@ class Currency(commands.Cog):
             raise commands.BadArgument(
                 f"{ctx.author.mention} You are too rich to gamble!"
             )
-        boost = self.bot.cache["users"][ctx.author.id]["boost"]
+        boost = await self.data.get_data(ctx.author.id, mode="boost")
         if wallet == 0:
             raise commands.BadArgument(
                 f"{ctx.author.mention} You have no coins to gamble with."
@@ -611,9 +549,10 @@ class Currency(commands.Cog):
 
     @tasks.loop(seconds=10)
     async def levels(self):
-        for user in self.cache:
-            await self.data.update_data(user, self.cache[user], mode="exp")
-            await self.data.update_data(user, self.cache[user] * 100, mode="max_bank")
+        cache, self.cache = self.cache, {}
+        for user in cache:
+            await self.data.update_data(user, cache[user], mode="exp")
+            await self.data.update_data(user, cache[user] * 100, mode="max_bank")
 
             if (
                 await self.data.get_data(user, mode="exp")
@@ -621,10 +560,8 @@ class Currency(commands.Cog):
             ):
                 await self.data.update_data(user, 1, mode="lvl")
                 await self.data.update_data(user, 0.01, mode="boost")
-                self.bot.cache["users"][user]["boost"] = round(
-                    await self.data.get_data(user, mode="boost"), 2
-                )
-        self.cache = {}
+                account = await self.data.get_account(user)
+                account["boost"] = round(account["boost"], 2)
 
     @levels.before_loop
     async def before_levels(self):
@@ -10,12 +10,13 @@ import discord
 import mystbin
 import contextlib
 import tabulate
-import utils.json_loader
+import time
 
 from discord.ext import commands
 from jishaku.codeblocks import codeblock_converter
+from utils.benchmarks import BENCHMARKS
+from utils.migrations import check_query_plans
 from utils.useful import Embed, pages
-from utils.json_loader import read_json, write_json
 
 @pages()
 async def show_result(self, menu, entry):
@@ -65,19 +66,16 @@ class Developer(commands.Cog):
             "message", timeout=10, check=lambda m: m.author == ctx.author
         )
         if msg.content.lower() == "y":
-            async with ctx.typing():
-                data = utils.json_loader.read_json("config")
+            async with self.bot.settings.edit("config") as data:
                 data["updates"]["date"] = str(datetime.datetime.utcnow())
                 data["updates"]["message"] = message
                 data["updates"]["link"] = link
-                utils.json_loader.write_json(data, "config")
             await ctx.send("Done!")
 
     @dev.command(name="status")
     async def _set_status(self, ctx: customContext, *, status):
-        data = utils.json_loader.read_json("status")
-        data["groot"] = status
-        utils.json_loader.write_json(data, "status")
+        async with self.bot.settings.edit("config") as data:
+            data["status"]["groot"] = status
         await ctx.send(f"Set status to {status}")
 
     @dev.command(name="eval", aliases=["run"])
@@ -103,12 +101,14 @@ class Developer(commands.Cog):
         # Stuff to do first before start
         async with ctx.processing(ctx, message="Restarting bot...") as process:
             await self.git(arguments="pull")
+            await self.bot.flusher.flush()
+            if music := self.bot.get_cog("Music"):
+                await music.save_players()
             await self.bot.db.commit()
 
-        data = read_json("config")
-        data['messages']['lastMessage'] = process.m.id
-        data['messages']['lastChannel'] = process.m.channel.id
-        write_json(data, "config")
+        async with self.bot.settings.edit("config") as data:
+            data['messages']['lastMessage'] = process.m.id
+            data['messages']['lastChannel'] = process.m.channel.id
         os._exit(0)
 
     @dev.command(name="sync")
@@ -185,6 +185,147 @@ class Developer(commands.Cog):
             byte = io.BytesIO(str(thing).encode("utf-8"))
             return await ctx.send(file=discord.File(fp=byte, filename="table.txt"))
 
+    @dev.command(name="flush")
+    async def _flush(self, ctx: customContext):
+        """Flushes the write-behind buffer and shows its statistics."""
+        rows = await self.bot.flusher.flush()
+        stats = tabulate.tabulate(self.bot.flusher.stats.items(), headers=("metric", "value"), tablefmt="psql")
+        await ctx.send(f"{self.bot.icons['greenTick']} Flushed `{rows}` rows.\n```\n{stats}```")
+
+    @dev.command(name="cache")
+    async def _cache(self, ctx: customContext):
+        """Shows the size, hit rate and memory of every cache."""
+        rows = []
+        for name, stats in self.bot.cache.stats().items():
+            lookups = stats.get("hits", 0) + stats.get("misses", 0)
+            rows.append((
+                name,
+                stats["size"],
+                stats.get("maxsize"),
+                stats.get("hits"),
+                stats.get("misses"),
+                f"{stats['hits'] / lookups:.1%}" if lookups else None,
+                stats.get("evictions"),
+                stats.get("loads"),
+                f"{stats['memory'] / 1024:.1f} KiB",
+            ))
+        headers = ("cache", "size", "maxsize", "hits", "misses", "hit rate", "evictions", "loads", "memory")
+        table = tabulate.tabulate(rows, headers=headers, tablefmt="psql")
+        await ctx.send(f"```\n{table}```")
+
+    @dev.command(name="publishers")
+    async def _publishers(self, ctx: customContext):
+        """Shows how many presence and status board updates were sent or skipped."""
+        publishers = self.bot.get_cog("Core").publishers
+        rows = [
+            (name, p.stats["issued"], p.stats["skipped"], p.stats["failed"], p.stats["backed_off"])
+            for name, p in publishers.items()
+        ]
+        table = tabulate.tabulate(rows, headers=("publisher", "issued", "skipped", "failed", "backed off"), tablefmt="psql")
+        await ctx.send(f"```\n{table}```")
+
+    @dev.command(name="gate")
+    async def _gate(self, ctx: customContext):
+        """Shows how many messages each stage of process_commands filtered."""
+        stats = self.bot.gate_stats
+        total = sum(stats.values()) or 1
+        rows = [(stage, count, f"{count / total:.1%}") for stage, count in stats.most_common()]
+        table = tabulate.tabulate(rows, headers=("stage", "messages", "share"), tablefmt="psql")
+        await ctx.send(f"```\n{table}```")
+
+    @dev.command(name="typing")
+    async def _typing(self, ctx: customContext):
+        """Shows how often each command took long enough to start typing."""
+        rows = sorted(
+            ((name, s["invokes"], s["typed"], f"{s['typed'] / s['invokes']:.1%}") for name, s in self.bot.typing_stats.items()),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+        table = tabulate.tabulate(rows[:25], headers=("command", "invokes", "typed", "share"), tablefmt="psql")
+        await ctx.send(f"```\n{table}```")
+
+    @dev.command(name="tracks")
+    async def _tracks(self, ctx: customContext):
+        """Shows where track lookups were resolved from."""
+        track_cache = self.bot.track_cache
+        stats = track_cache.cache.stats
+        rows = [
+            ("memory", stats["hits"]),
+            ("database", track_cache.stats["database"]),
+            ("lavalink", track_cache.stats["lavalink"]),
+            ("empty (not cached)", track_cache.stats["empty"]),
+        ]
+        table = tabulate.tabulate(rows, headers=("source", "lookups"), tablefmt="psql")
+        await ctx.send(f"```\n{table}```")
+
+    @dev.command(name="nodes")
+    async def _nodes(self, ctx: customContext):
+        """Shows the Lavalink nodes, their load and how many players were moved between them."""
+        rows = []
+        for node in self.bot.wavelink.nodes.values():
+            stats = node.stats
+            rows.append((
+                node.identifier,
+                node.is_available,
+                len(node.players),
+                f"{stats.system_load:.0%}" if stats else None,
+                stats.frames_deficit if stats else None,
+                round(self.bot.nodes.score(node), 1),
+            ))
+        table = tabulate.tabulate(rows, headers=("node", "available", "players", "cpu", "deficit", "score"), tablefmt="psql")
+        migrations = self.bot.nodes.stats
+        await ctx.send(f"```\n{table}```Migrated `{migrations['migrated']}` players, `{migrations['failed']}` failed.")
+
+    @dev.command(name="players")
+    async def _players(self, ctx: customContext):
+        """Shows every music player, how long it has been idle and its approximate memory."""
+        music = self.bot.get_cog("Music")
+        now = time.monotonic()
+        rows = []
+        for guild_id in self.bot.nodes.live:
+            if (player := self.bot.nodes.find(guild_id)) is None:
+                continue
+            rows.append((
+                guild_id,
+                player.node.identifier,
+                len(player.queue),
+                len(player.queue.history),
+                round(now - player.idle_since) if player.idle_since else None,
+                player.memory(),
+            ))
+        rows.sort(key=lambda row: row[-1], reverse=True)
+        total = sum(row[-1] for row in rows)
+        rows = [(*row[:-1], f"{row[-1] / 1024:.1f} KiB") for row in rows[:20]]
+        table = tabulate.tabulate(rows, headers=("guild", "node", "queue", "history", "idle s", "memory"), tablefmt="psql")
+        await ctx.send(
+            f"```\n{table}```{len(self.bot.nodes.live)} players using {total / 1024:.1f} KiB, "
+            f"{music.reaped} reaped after {music.idle_timeout}s idle."
+        )
+
+    @dev.command(name="bench")
+    async def _bench(self, ctx: customContext, name: str = None):
+        """Runs one of the benchmarks in utils.benchmarks."""
+        if name not in BENCHMARKS:
+            return await ctx.send(f"Available benchmarks: {', '.join(f'`{b}`' for b in BENCHMARKS)}")
+
+        async with ctx.processing(ctx, message=f"Running benchmark `{name}`...", delete_after=True):
+            headers, rows = await BENCHMARKS[name](self.bot)
+        table = tabulate.tabulate(rows, headers=headers, tablefmt="psql")
+        await ctx.send(f"```\n{table}```")
+
+    @dev.command(name="plans")
+    async def _plans(self, ctx: customContext):
+        """Checks that no hot query does a full table scan."""
+        try:
+            plans = await check_query_plans(self.bot.db)
+        except RuntimeError as e:
+            await ctx.message.add_reaction(f"{self.bot.icons['redTick']}")
+            return await ctx.send(f"```\n{e}```")
+
+        table = tabulate.tabulate(plans, headers=("query", "plan"), tablefmt="psql")
+        byte = io.BytesIO(table.encode("utf-8"))
+        await ctx.send(f"{self.bot.icons['greenTick']} No full table scans.", file=discord.File(fp=byte, filename="plans.txt"))
+
     @sql.error
     async def sql_error(self, ctx: customContext, error):
         if isinstance(error, commands.CommandInvokeError):
@@ -6,7 +6,6 @@ import contextlib
 from datetime import datetime
 from itertools import chain
 from discord.ext import commands
-from utils.json_loader import read_json
 from utils.useful import Cooldown, Embed
 
 
@@ -97,7 +96,7 @@ class GrootHelp(commands.HelpCommand):
         )
 
         # News
-        config = read_json("config")
+        config = bot.settings.get("config")
         news = config['updates']
         date = datetime.strptime(news['date'], "%Y-%m-%d %H:%M:%S.%f")
         date, link, message = date.strftime("%d %B, %Y"), news['link'], news['message']
@@ -158,7 +157,12 @@ class GrootHelp(commands.HelpCommand):
 
         if res:
             return None
-            
+
+        suggestions = [
+            f"`{name}`" for name, cmd in self.context.bot.command_index.search(command, limit=5) if not cmd.hidden
+        ]
+        if suggestions:
+            return f"No command/category called `{command}` found. Did you mean {', '.join(suggestions)}?"
         return f"No command/category called `{command}` found."
             
     
@@ -93,7 +93,7 @@ class Moderator(commands.Cog):
     async def _edit_(
         self, ctx: customContext, action, user: typing.Union[discord.Member, discord.User], amount: int
     ):
-        self.bot.cache["users"][user.id][action] += amount
+        await self.bot.data.update_data(user.id, amount, mode=action)
         return await ctx.send(
             f"{self.bot.icons['greenTick']} Successfully gave {user.mention} {amount:,} `{action}`."
         )
@@ -130,18 +130,17 @@ class Moderator(commands.Cog):
                 VALUES (?,?,?,?,?)
                 """
         await self.bot.db.execute(query, (a[4], a[1], a[0], a[3], a[2]))
+        await self.bot.data.inventory.load_items()
         cmd = self.bot.get_command("shop")
         return await ctx.invoke(cmd, item=a[0])
 
     @mod.command(name="delete")
     async def _delete_item_from_shop(self, ctx: customContext, *, item):
-        item = item.lower()
-        query = """
-                DELETE FROM item_info
-                WHERE lower(item_name) = ?
-                """
-        await self.bot.db.execute(query, (item,))
-        return await ctx.send(f"{self.bot.icons['greenTick']} Deleted item `{item}` from shop.")
+        data = self.bot.data.inventory.get_item(item)
+        if not data:
+            raise commands.BadArgument("This item doesn't exist!")
+        await self.bot.data.inventory.delete_item(data)
+        return await ctx.send(f"{self.bot.icons['greenTick']} Deleted item `{data.name}` from shop.")
 
 def setup(bot):
     bot.add_cog(Moderator(bot))
@@ -3,36 +3,141 @@ from utils._type import *
 import asyncio
 import async_timeout
 import discord
+import itertools
+import json
+import logging
 import re
 import wavelink
 import math
-import random
+import sys
+import time
 
-from discord.ext import commands, menus
-from utils.useful import Embed, get_title
+from discord.ext import commands, menus, tasks
+from utils.useful import Embed, convert, get_title
 from utils import paginations
+from utils.cache import sizeof
+from utils.nodes import NodePool
+from utils.publisher import Publisher
+from utils.tracks import TrackQueue
 
 
 URL_REG = re.compile(r'https?://(?:www\.)?.+')
-
-def convert(ms):
-    seconds, milliseconds = divmod(ms, 1000)
-    minutes, seconds = divmod(seconds, 60)
-    hours, minutes = divmod(minutes, 60)
-
-    result = [hours, minutes, seconds]
-    format_result = [f"0{i}" if len(str(i)) == 1 else str(i) for i in result]
-    return ":".join(format_result).removeprefix("00:").removesuffix(":")
+# seconds during which updates of the now playing message are combined into one edit
+NOW_PLAYING_WINDOW = 2
+# seconds between two saves of the player states, and age after which a saved state is ignored
+PLAYER_SAVE_INTERVAL = 60
+PLAYER_STATE_MAX_AGE = 60 * 60
+# seconds the saved players are left to be restored by a command or a voice event before the rest is restored
+PLAYER_RESTORE_DELAY = 10
 
 class Track(wavelink.Track):
-    """Wavelink Track object with a requester attribute."""
+    """Wavelink Track object with a requester attribute.
 
-    __slots__ = ('requester', )
+    `song_id` is set for the songs of a playlist, whose track is stored in playlist_songs.
+    """
+
+    __slots__ = ('requester', 'song_id')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args)
 
         self.requester = kwargs.get('requester')
+        self.song_id = kwargs.get('song_id')
+
+class NowPlaying:
+    """The now playing message of a player, sent once and then edited.
+
+    Updates requested within `window` seconds of each other are combined into one
+    edit, and edits that wouldn't change the message are skipped. The parts of the
+    embed that only depend on the track are built once per track. A failed edit sends
+    a new message, and a new track is shown even while failed sends are backing off.
+    """
+
+    def __init__(self, player, window=NOW_PLAYING_WINDOW):
+        self.player = player
+        self.window = window
+        self.message = None
+        self.publisher = Publisher(f"now playing {player.guild_id}")
+        self._lock = asyncio.Lock()
+        self._pending = None
+        self._track = None
+        self._static = None
+
+    def static(self, track):
+        if track is not self._track:
+            self._track = track
+            self._static = {
+                "title": get_title(track),
+                "author": track.author,
+                "duration": convert(int(track.length)),
+                "requester": track.requester,
+            }
+        return self._static
+
+    def build(self):
+        """Returns the content and embed of the message, None if nothing is playing."""
+        player = self.player
+        if not (track := player.current):
+            return None
+
+        static = self.static(track)
+        icons = player.ctx.bot.icons
+        em = Embed(title=static["title"], url=track.uri)
+        fields = {
+            "Author": static["author"],
+            "Duration": static["duration"],
+            "Looping": icons['greenTick'] if player.looping else icons['redTick'],
+            "Requested by": static["requester"].mention,
+            "DJ": player.dj.mention,
+            "Volume": f"{player.volume}%",
+        }
+        for k, v in fields.items():
+            em.add_field(name=k, value=v, inline=True)
+
+        em.set_thumbnail(url=track.thumb)
+        em.set_footer(text=f"Queue index: 1/{len(player.queue)+1}", icon_url=static["requester"].avatar_url)
+        return f"Now playing: **{track.title}**", em
+
+    def update(self):
+        """Schedules an update of the message, updates requested meanwhile are combined into it."""
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.ensure_future(self._update_later())
+
+    async def _update_later(self):
+        await asyncio.sleep(self.window)
+        await self.flush()
+
+    async def flush(self, *, new=False):
+        """Updates the message now, `new` sends a new one instead of editing the last one."""
+        async with self._lock:
+            # a new track is always shown, even if an earlier update failed and is backing off
+            if self.player.current is not self._track:
+                self.publisher.reset()
+            if (built := self.build()) is None:
+                return
+            content, em = built
+            if new:
+                self.message = None
+                self.publisher.reset()
+            await self.publisher.publish([content, em.to_dict()], lambda: self._send(content, em))
+
+    async def _send(self, content, em):
+        if self.message is not None:
+            try:
+                return await self.message.edit(content=content, embed=em)
+            except discord.HTTPException:
+                # a deleted message or a failed edit, a new message is sent instead of backing off
+                pass
+        self.message = await self.player.ctx.reply(content=content, embed=em)
+
+    async def send(self):
+        """Sends the message again below the latest messages, the old one is no longer edited."""
+        await self.flush(new=True)
+
+    def cancel(self):
+        if self._pending is not None:
+            self._pending.cancel()
+
 
 class Player(wavelink.Player):
 
@@ -44,15 +149,53 @@ class Player(wavelink.Player):
             self.dj = self.ctx.author
 
         self.waiting = False
-        self.updating = False
         self.looping = False
 
         self.previous = None
-        self.queue = asyncio.Queue()
+        self.queue = TrackQueue()
 
         self.skip_votes = set()
         self.stop_votes = set()
         self.shuffle_votes = set()
+
+        # monotonic time since which the player is idle, see Music.reap_players
+        self.idle_since = None
+        self.now_playing = NowPlaying(self)
+
+    def is_idle(self):
+        """Whether nothing is playing or nobody is listening."""
+        if not self.is_connected or self.paused or not self.is_playing:
+            return True
+        channel = self.bot.get_channel(int(self.channel_id))
+        return channel is None or all(member.bot for member in channel.members)
+
+    def memory(self):
+        """Approximate memory used by the player and its queued and played tracks."""
+        tracks = itertools.chain(self.queue, self.queue.history)
+        # the other attributes of a track point into its info or are shared with other tracks
+        return sizeof(vars(self), depth=1) + sum(sys.getsizeof(track) + sys.getsizeof(track.id) + sizeof(track.info) for track in tracks)
+
+    def snapshot(self):
+        """Returns the player_state row of the player, None if nothing is playing."""
+        if not self.is_connected or not self.current or not self.ctx:
+            return None
+        tracks = [
+            {"track": track.id, "info": track.info, "requester": getattr(track.requester, "id", None), "song_id": getattr(track, "song_id", None)}
+            for track in itertools.chain((self.current, ), self.queue)
+        ]
+        return (
+            self.guild_id,
+            self.channel_id,
+            self.ctx.channel.id,
+            getattr(self.dj, "id", None),
+            self.volume,
+            self.looping,
+            self.queue.loop,
+            self.paused,
+            int(self.position),
+            json.dumps(tracks, separators=(",", ":")),
+            time.time(),
+        )
     
     async def play_next(self):
         if self.is_playing or self.waiting:
@@ -77,7 +220,7 @@ class Player(wavelink.Player):
             return await self.teardown()
         
         await self.play(track)
-        await self.send_embed()
+        self.now_playing.update()
         
         self.previous = track
         self.waiting = False
@@ -88,36 +231,10 @@ class Player(wavelink.Player):
         self.looping = False
         await super().stop()
 
-    async def send_embed(self):
-        if self.updating: return
-
-        self.updating = True
-        track = self.current
-        if not track: return
-
-        channel = self.bot.get_channel(int(self.channel_id))
-        queue_size = self.queue.qsize()
-
-        em = Embed(
-            title = get_title(track),
-            url = track.uri
-        )
-
-        fields = {
-            "Author": (track.author, True), 
-            "Duration": (convert(int(track.length)), True),
-            "Looping": (f"{self.ctx.bot.icons['greenTick'] if self.looping else self.ctx.bot.icons['redTick']}", True),
-            "Requested by": (track.requester.mention, True),
-            "DJ": (self.dj.mention, True),
-            "Volume": (f"{self.volume}%", True)
-        }
-        for k, v in fields.items():
-            em.add_field(name=k, value=v[0], inline=True)
-        
-        em.set_thumbnail(url=track.thumb)
-        em.set_footer(text=f"Queue index: 1/{self.queue.qsize()+1}", icon_url=track.requester.avatar_url)
-        await self.ctx.reply(content=f"Now playing: **{track.title}**", embed=em)
-        self.updating = False
+    async def destroy(self, *, force: bool = False):
+        self.bot.nodes.live.discard(self.guild_id)
+        self.now_playing.cancel()
+        await super().destroy(force=force)
 
     async def teardown(self):
         try:
@@ -134,34 +251,160 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
 
         if not hasattr(bot, 'wavelink'):
             self.bot.wavelink = wavelink.Client(bot=bot)
+            self.bot.nodes = NodePool(bot, self.bot.wavelink)
         
         self.bot.loop.create_task(self.start_nodes())
+        self.check_nodes.start()
+
+        self.idle_timeout = int(bot.config.get("PLAYER_IDLE_TIMEOUT", 180))
+        self.reaped = 0
+        self.reap_players.start()
+
+        # saved players not restored yet, by guild id, and the restores running
+        self.pending_restore = {}
+        self.restoring = {}
+        # set once the saved players are loaded, saving before that would delete them
+        self.saved_loaded = asyncio.Event()
+        self.save_players_loop.start()
+
+    def cog_unload(self):
+        self.check_nodes.cancel()
+        self.reap_players.cancel()
+        self.save_players_loop.cancel()
+
+    async def cog_before_invoke(self, ctx: customContext):
+        if ctx.guild and (ctx.guild.id in self.pending_restore or ctx.guild.id in self.restoring):
+            await self.restore(ctx.guild.id)
     
     async def start_nodes(self):
         await self.bot.wait_until_ready()
-        
-        if self.bot.wavelink.nodes:
-            previous = self.bot.wavelink.nodes.copy()
+        await self.bot.nodes.connect()
+        try:
+            await self.load_saved_players()
+        finally:
+            self.saved_loaded.set()
+        await asyncio.sleep(PLAYER_RESTORE_DELAY)
+        await self.restore_players()
+
+    @tasks.loop(seconds=15)
+    async def check_nodes(self):
+        """Reconnects the nodes that never connected and moves players off unhealthy ones."""
+        await self.bot.nodes.reconnect()
+        await self.bot.nodes.rebalance()
+
+    @check_nodes.before_loop
+    async def before_check_nodes(self):
+        await self.bot.wait_until_ready()
 
-            for node in previous.values():
-                await node.destroy()
-        
-        created = False
-        node_num = 1
+    # Player state
+
+    async def save_players(self):
+        """Saves the state of every playing player, forgets the others, and returns how many were saved."""
+        snapshots = []
+        for guild_id in list(self.bot.nodes.live):
+            if (player := self.bot.nodes.find(guild_id)) and (snapshot := player.snapshot()):
+                snapshots.append(snapshot)
+        keep = {snapshot[0] for snapshot in snapshots} | self.pending_restore.keys() | self.restoring.keys()
+
+        async with self.bot.db.transaction() as db:
+            # until the saved players are loaded every row would look stale
+            if self.saved_loaded.is_set():
+                async with db.execute("SELECT guild_id FROM player_state") as cur:
+                    stale = [row for row in await cur.fetchall() if row[0] not in keep]
+                await db.executemany("DELETE FROM player_state WHERE guild_id = ?", stale)
+            await db.executemany(
+                """
+                INSERT OR REPLACE INTO player_state
+                (guild_id, channel_id, text_channel_id, dj_id, volume, looping, loop_queue, paused, position, tracks, saved_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                snapshots,
+            )
+        return len(snapshots)
+
+    @tasks.loop(seconds=PLAYER_SAVE_INTERVAL)
+    async def save_players_loop(self):
+        await self.save_players()
+
+    @save_players_loop.before_loop
+    async def before_save_players(self):
+        await self.saved_loaded.wait()
+
+    async def load_saved_players(self):
+        """Loads the players saved less than `PLAYER_STATE_MAX_AGE` seconds ago into `pending_restore`."""
+        query = "SELECT * FROM player_state WHERE saved_at > ?"
+        rows = await self.bot.db.fetchall(query, (time.time() - PLAYER_STATE_MAX_AGE, ))
+        self.pending_restore.update((row[0], row) for row in rows if row[0] not in self.bot.nodes.live)
+
+    async def restore_players(self):
+        """Restores the saved players no command or voice event restored yet, one guild at a time."""
+        for guild_id in list(self.pending_restore):
+            if guild_id not in self.pending_restore:
+                continue
+            await self.restore(guild_id)
+            # spreads the voice connections
+            await asyncio.sleep(1)
+
+    async def restore(self, guild_id):
+        """Restores the saved player of a guild, or waits for the restore already running."""
+        if (task := self.restoring.get(guild_id)) is None:
+            if (row := self.pending_restore.pop(guild_id, None)) is None:
+                return
+            task = self.restoring[guild_id] = self.bot.loop.create_task(self.restore_player(row))
+            task.add_done_callback(lambda _: self.restoring.pop(guild_id, None))
+        await asyncio.shield(task)
+
+    async def restore_player(self, row):
+        """Reconnects a saved player and plays its track from the saved position, without looking up any track."""
+        guild_id, channel_id, text_channel_id, dj_id, volume, looping, loop_queue, paused, position, tracks, _ = row
+
+        guild = self.bot.get_guild(guild_id)
+        channel = guild and guild.get_channel(channel_id)
+        text_channel = guild and guild.get_channel(text_channel_id)
+        if not channel or not text_channel or all(member.bot for member in channel.members):
+            return
 
-        while not created:
-            try:
-                await self.bot.wavelink.initiate_node(
-                    host='127.0.0.1',
-                    port=2333,
-                    rest_uri='http://127.0.0.1:2333',
-                    password=self.bot.config.get('password'),
-                    identifier=f"Node {node_num}",
-                    region=f"us_central"
-                )
-            except wavelink.errors.NodeOccupied:
-                node_num += 1
-                created = True
+        try:
+            tracks = [
+                Track(track["track"], track["info"], requester=guild.get_member(track["requester"]) or guild.me, song_id=track["song_id"])
+                for track in json.loads(tracks)
+            ]
+            notice = await text_channel.send(f"{self.bot.icons['greenTick']} | Resuming **{tracks[0].title}** after a restart.")
+            ctx = await self.bot.get_context(notice)
+            player = self.bot.nodes.get_player(guild_id, cls=Player, context=ctx)
+            player.dj = guild.get_member(dj_id) or guild.me
+            player.looping = bool(looping)
+            player.queue.loop = bool(loop_queue)
+            player.queue.extend(tracks[1:])
+
+            await player.connect(channel.id)
+            if volume != 100:
+                await player.set_volume(volume)
+            await player.play(tracks[0], start=position)
+            if paused:
+                await player.set_pause(True)
+        except Exception as error:
+            logging.warning(f"Restoring the player of {guild_id} failed: {error!r}")
+            return
+
+        player.previous = tracks[0]
+        player.now_playing.message = notice
+        player.now_playing.update()
+
+    @tasks.loop(seconds=30)
+    async def reap_players(self):
+        """Tears down the players that have been idle for `idle_timeout` seconds."""
+        now = time.monotonic()
+        for guild_id in list(self.bot.nodes.live):
+            if (player := self.bot.nodes.find(guild_id)) is None:
+                continue
+            if not player.is_idle():
+                player.idle_since = None
+            elif player.idle_since is None:
+                player.idle_since = now
+            elif now - player.idle_since >= self.idle_timeout:
+                await player.teardown()
+                self.reaped += 1
     
     def required(self, ctx: customContext):
         """Method which returns required votes based on amount of members in a channel."""
@@ -176,7 +419,7 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
         return required
     
     def get_player(self, ctx: customContext):
-        player = self.bot.wavelink.get_player(guild_id=ctx.guild.id, cls=Player, context=ctx)
+        player = self.bot.nodes.get_player(ctx.guild.id, cls=Player, context=ctx)
         player.update_context(ctx)
         return player
     
@@ -186,18 +429,30 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
 
     @wavelink.WavelinkMixin.listener('on_track_stuck')
     @wavelink.WavelinkMixin.listener('on_track_end')
-    @wavelink.WavelinkMixin.listener('on_track_exception')
     async def on_player_stop(self, node: wavelink.Node, payload):
         await payload.player.play_next()
 
     @wavelink.WavelinkMixin.listener("on_track_exception") #ty to cryptex for helping because jadon is stupid omegalul
     async def on_node_event_(self, node, event):
+        # the only handler of track exceptions, `waiting` makes the track end event that
+        # follows skip play_next, so the replacement and the next song don't race
+        player = event.player
+        player.waiting = True
+        try:
+            replaced = await self.retry_stored_track(event) or await self.replace_failed_track(event)
+        finally:
+            player.waiting = False
+        if not replaced:
+            await player.play_next()
+
+    async def replace_failed_track(self, event):
+        """Plays the track again from SoundCloud when YouTube rate limited it."""
         if "YouTube (429)" in event.error:
             player = event.player
             if URL_REG.fullmatch(player.query):
-                new_track = await self.bot.wavelink.get_tracks(f"scsearch:{player.track.title}")
+                new_track = await self.bot.track_cache.get_tracks(f"scsearch:{player.track.title}")
             else:
-                new_track = await self.bot.wavelink.get_tracks(f"scsearch:{player.query}")
+                new_track = await self.bot.track_cache.get_tracks(f"scsearch:{player.query}")
             if new_track:
                 track = Track(
                     new_track[0].id,
@@ -205,21 +460,46 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
                     requester=player.ctx.author,
                 )
                 await player.play(track)
-                await player.send_embed()
-            else:
-                raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song was found with the given query. Try again.")
+                player.now_playing.update()
+                return True
+            await player.ctx.send(f"{self.bot.icons['redTick']} | No song was found with the given query. Try again.")
         else:
             await event.player.ctx.send(event.error)
+        return False
+
+    async def retry_stored_track(self, event):
+        """Resolves a playlist song again when its stored track failed, and stores the new one."""
+        from cogs.playlists import save_tracks  # cogs.playlists imports this module
+        player = event.player
+        track = next((t for t in (player.current, player.previous) if getattr(t, "id", None) == event.track), None)
+        if getattr(track, "song_id", None) is None:
+            return False
+
+        await self.bot.track_cache.invalidate(track.uri)
+        tracks = await self.bot.track_cache.get_tracks(track.uri)
+        if not tracks or isinstance(tracks, wavelink.TrackPlaylist) or tracks[0].id == track.id:
+            return False
+
+        new_track = Track(tracks[0].id, tracks[0].info, requester=track.requester)
+        await save_tracks(self.bot.db, [(track.song_id, new_track)])
+        await player.play(new_track)
+        player.now_playing.update()
+        return True
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         if member.bot:
             return
 
-        player = self.bot.wavelink.get_player(member.guild.id, cls=Player)
+        if (row := self.pending_restore.get(member.guild.id)) is not None and after.channel and after.channel.id == row[1]:
+            return await self.restore(member.guild.id)
+
+        if member.guild.id not in self.bot.nodes.live:
+            return
+
+        player = self.bot.nodes.find(member.guild.id)
 
-        if not player.channel_id or not player.ctx:
-            player.node.players.pop(member.guild.id)
+        if player is None or not player.channel_id or not player.ctx:
             return
 
         channel = self.bot.get_channel(int(player.channel_id))
@@ -263,36 +543,38 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
         if not URL_REG.match(query):
             query = f'ytsearch:{query}'
         
-        tracks = await self.bot.wavelink.get_tracks(query)
+        tracks = await self.bot.track_cache.get_tracks(query)
         if not tracks:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song was found with the given query. Try again.")
         
         if isinstance(tracks, wavelink.TrackPlaylist):
-            for track in tracks.tracks:
-                track = Track(track.id, track.info, requester=ctx.author)
-                await player.queue.put(track)
+            player.queue.extend(Track(track.id, track.info, requester=ctx.author) for track in tracks.tracks)
             
             await ctx.reply(f"{self.bot.icons['plus']} | Added the playlist {tracks.data['playlistInfo']['name']} to the queue.")
         else:
             track = Track(tracks[0].id, tracks[0].info, requester=ctx.author)
             await ctx.reply(f"{self.bot.icons['plus']} | Added the song **{track.title}** to the queue.")
-            await player.queue.put(track)
+            player.queue.put(track)
         
         if not player.is_playing:
             await player.play_next()
     
-    @commands.command(name="loop")
-    async def _loop(self, ctx: customContext):
-        """Loops the current song or turns the loop off"""
+    @commands.command(name="loop", usage="[queue]")
+    async def _loop(self, ctx: customContext, mode: str = None):
+        """Loops the current song or the whole queue, or turns the loop off"""
         player = self.get_player(ctx)
 
-        if player.looping:
+        if mode == "queue":
+            player.queue.loop = not player.queue.loop
+            message = "Looping the queue..." if player.queue.loop else "Stopped looping the queue"
+        elif player.looping:
             player.looping = False
             message = f"Stopped looping **{player.current.title}**"
         else:
             player.looping = True
             message = f"Looping **{player.current.title}**..."
         
+        player.now_playing.update()
         return await ctx.reply(f"{self.bot.icons['greenTick']} | {message}")
         
     @commands.command(name="skip", aliases=["next"])
@@ -348,13 +630,11 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
         if not player.is_connected:
             return
 
-        if player.queue.qsize() == 0:
+        if not player.queue:
             await ctx.reply(f"{self.bot.icons['redTick']} | No more songs in the queue. Add some songs to the queue and try again.")
             return
-        
 
-        entries = [f"**{i+1}**. [{track.title}]({track.uri}) | `{convert(int(track.length))}`" for i, track in enumerate(player.queue._queue, start=1)]
-        menu = menus.MenuPages(paginations.QueueSource(entries, player))
+        menu = menus.MenuPages(paginations.QueueSource(player))
         await menu.start(ctx)
     
     @queue.command(name="remove")
@@ -364,15 +644,43 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
         if not player.is_connected:
             return
 
-        size = player.queue.qsize() + 1
+        size = len(player.queue) + 1
         
-        if position > size or position == 1:
+        if position > size or position <= 1:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | The given song number to remove must be inside the queue (and not the current playing one).")
 
-        track = player.queue._queue[position-2]
-        del player.queue._queue[position-2]
+        track = player.queue.remove(position-2)
         await ctx.reply(f"{self.bot.icons['minus']} | Removed **{position}. {track.title}** from the queue.")
 
+    @queue.command(name="move", usage="<position> <new position>")
+    async def _move(self, ctx: customContext, position: int, new_position: int):
+        player = self.get_player(ctx)
+
+        if not player.is_connected:
+            return
+
+        if not self.is_privileged(ctx):
+            return await ctx.reply(f"{self.bot.icons['redTick']} | Only the requester or the DJ can move songs.")
+
+        size = len(player.queue) + 1
+
+        if not (1 < position <= size and 1 < new_position <= size):
+            raise commands.BadArgument(f"{self.bot.icons['redTick']} | The given song numbers must be inside the queue (and not the current playing one).")
+
+        track = player.queue.move(position-2, new_position-2)
+        await ctx.reply(f"{self.bot.icons['greenTick']} | Moved **{track.title}** to position {new_position}.")
+
+    @queue.command(name="history")
+    async def _history(self, ctx: customContext):
+        """Shows the last songs the player played."""
+        player = self.get_player(ctx)
+
+        if not player.queue.history:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | No song was played yet.")
+
+        entries = [f"**{i}**. [{track.title}]({track.uri})" for i, track in enumerate(itertools.islice(player.queue.history, 10), start=1)]
+        await ctx.reply(embed=Embed(title="Recently played", description="\n".join(entries)))
+
     
     @commands.command(name="volume")
     async def _volume(self, ctx: customContext, volume: int):
@@ -389,6 +697,7 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
             return await ctx.reply(f"{self.bot.icons['redTick']} | The volume value must be in between 0 and 100")
         
         await player.set_volume(volume)
+        player.now_playing.update()
         await ctx.reply(f"{self.bot.icons['greenTick']} | Changed volume to {volume}%")
 
     @commands.command(name="shuffle")
@@ -399,11 +708,11 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
         if not player.is_connected:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song is playing.")
         
-        if player.queue.qsize() < 3:
+        if len(player.queue) < 3:
             return await ctx.reply(f"{self.bot.icons['redTick']} | Add more songs to the queue first before shuffling.")
 
         if self.is_privileged(ctx):
-            random.shuffle(player.queue._queue)
+            player.queue.shuffle()
             return await ctx.reply(f"{self.bot.icons['greenTick']} | {ctx.author.mention} shuffled the playlist.")
 
         required = self.required(ctx)
@@ -411,7 +720,7 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
 
         if (votes := len(player.skip_votes)) >= required:
             player.skip_votes.clear()
-            random.shuffle(player.queue._queue)
+            player.queue.shuffle()
             await ctx.reply(f"{self.bot.icons['greenTick']} | Shuffled playlist.")
         else:
             await ctx.reply(f'{ctx.author.mention} has voted to shuffle the playlist. (`{votes}/{required}`)')
@@ -424,7 +733,7 @@ class Music(commands.Cog, wavelink.WavelinkMixin):
         if not player.is_connected:
             raise commands.BadArgument(f"{self.bot.icons['redTick']} | No song is playing.")
         
-        await player.send_embed()
+        await player.now_playing.send()
 
     @commands.command(aliases=['eq'], usage="<flat|boost|metal|piano>")
     async def equalizer(self, ctx: customContext, *, equalizer: str):
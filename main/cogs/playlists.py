@@ -1,17 +1,62 @@
 from utils._type import *
 
 import asyncio
+import collections
+import itertools
+import logging
 import re
+import time
 import wavelink
-import random
 
-from discord.ext import commands, menus
+from discord.ext import commands, menus, tasks
 from utils.useful import Embed, get_title
 from utils import paginations
 from cogs.music import Track
 
 
 URL_REG = re.compile(r'https?://(?:www\.)?.+')
+# songs of a playlist resolved at once
+RESOLVE_CONCURRENCY = 5
+# seconds between two edits of the progress message
+PROGRESS_INTERVAL = 5
+# songs without a stored track resolved by every run of the backfill
+BACKFILL_BATCH = 25
+# songs a user can have across all of their playlists
+MAX_USER_SONGS = 500
+
+# returned by Playlist.resolve when the lookup failed, the song is resolved again next time
+LOOKUP_FAILED = object()
+
+# track_id is None if the song was never resolved and '' if it couldn't be
+Song = collections.namedtuple("Song", "name url song_id track_id identifier length author")
+
+
+def stored_track(song, requester):
+    """Builds the track of a song from its stored Lavalink data, None if there is none."""
+    if not song.track_id:
+        return None
+    info = {
+        "title": song.name,
+        "identifier": song.identifier,
+        "length": song.length,
+        "author": song.author,
+        "uri": song.url,
+        "isStream": False,
+    }
+    return Track(song.track_id, info, requester=requester, song_id=song.song_id)
+
+
+async def save_tracks(db, songs):
+    """Stores the resolved track of every `(song_id, track)` pair, track is None if it couldn't be resolved."""
+    query = """
+            UPDATE playlist_songs
+            SET track_id = ?, track_identifier = ?, track_length = ?, track_author = ?
+            WHERE song_id = ?
+            """
+    await db.executemany(query, [
+        (track.id, track.identifier, track.length, track.author, song_id) if track else ("", None, None, None, song_id)
+        for song_id, track in songs
+    ])
 
 class Playlist:
     """Custom class for playlist"""
@@ -19,31 +64,84 @@ class Playlist:
         self.name = kwargs['name']
         self.id = kwargs['id']
         self.length = kwargs['length']
-        self.songs = kwargs['songs'] # In tuples (song_name, url, song_id)
+        self.songs = kwargs['songs'] # Song tuples
     
-    async def play(self, ctx: customContext, wavelink, player, requester, **kwargs):
+    async def play(self, ctx: customContext, track_cache, player, requester, **kwargs):
+        """Queues the songs in order, resolving up to `RESOLVE_CONCURRENCY` of them at once.
+
+        Songs with a stored track are queued without a lookup. Playback starts with
+        the first song that resolves, the progress message is edited at most every
+        `PROGRESS_INTERVAL` seconds and the songs that couldn't be loaded are listed
+        once at the end.
+        """
         amt_of_songs = kwargs['songs']
-        msg = await ctx.reply(f"<a:loading:856978168476205066> | `(0/{amt_of_songs})` Queueing songs... please be patient.\n_This might take a while_")
+        progress = "<a:loading:856978168476205066> | `({}/{})` Queueing songs... please be patient.\n_This might take a while_"
+        msg = await ctx.reply(progress.format(0, amt_of_songs))
+
+        songs = iter(self.songs)
+        pending = collections.deque()
+
+        def schedule():
+            for song in itertools.islice(songs, RESOLVE_CONCURRENCY - len(pending)):
+                pending.append((song, asyncio.ensure_future(self.resolve(track_cache, song, requester))))
+
         loaded_songs = 0
-        for song in self.songs:
-            if random.randint(0, 20) > 16:
-                await msg.edit(content=f"<a:loading:856978168476205066> | `({loaded_songs}/{amt_of_songs})` Queueing songs... please be patient.\n_This might take a while_")
-            tracks = await wavelink.get_tracks(song[1])
-            try:
-                track = Track(tracks[0].id, tracks[0].info, requester=requester)
-            except Exception as e:
-                await ctx.send(f"{song[0]} couldn't be loaded...")
-            else:
-                await player.queue.put(track)
-            loaded_songs += 1
-        
-        await msg.edit(content=f"<:greenTick:814504388139155477> | `({loaded_songs}/{amt_of_songs})` Queued songs! Now playing...")
-        await asyncio.sleep(0.5)
-        await player.play_next()
-        
-    
+        failed = []
+        resolved = []
+        last_edit = time.monotonic()
+        schedule()
+        try:
+            while pending:
+                song, task = pending.popleft()
+                track = await task
+                schedule()
+                loaded_songs += 1
+                if track is LOOKUP_FAILED:
+                    track = None
+                elif not song.track_id:
+                    resolved.append((song.song_id, track))
+
+                if track is None:
+                    failed.append(song[0])
+                else:
+                    player.queue.put(track)
+                    if not player.is_playing:
+                        await player.play_next()
+
+                if time.monotonic() - last_edit >= PROGRESS_INTERVAL:
+                    last_edit = time.monotonic()
+                    await msg.edit(content=progress.format(loaded_songs, amt_of_songs))
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if resolved:
+                await save_tracks(ctx.bot.db, resolved)
+
+        await msg.edit(content=f"<:greenTick:814504388139155477> | `({loaded_songs - len(failed)}/{amt_of_songs})` Queued songs!")
+        if failed:
+            names = ", ".join(f"`{name}`" for name in failed[:10])
+            more = f" and {len(failed) - 10} more" if len(failed) > 10 else ""
+            await ctx.send(f"{ctx.bot.icons['redTick']} | {len(failed)} song(s) couldn't be loaded: {names}{more}")
+
+    @staticmethod
+    async def resolve(track_cache, song, requester):
+        """Returns the track of a song, stored or looked up.
+
+        None if the song couldn't be found, `LOOKUP_FAILED` if the lookup itself failed.
+        """
+        if track := stored_track(song, requester):
+            return track
+        try:
+            tracks = await track_cache.get_tracks(song.url)
+        except Exception as error:
+            logging.warning(f"Loading playlist song {song.url} failed: {error!r}")
+            return LOOKUP_FAILED
+        if not tracks or isinstance(tracks, wavelink.TrackPlaylist):
+            return None
+        return Track(tracks[0].id, tracks[0].info, requester=requester, song_id=song.song_id)
+
     async def remove_song(self, db, song_id):
-        songs = [tup[2] for tup in self.songs]
+        songs = [song.song_id for song in self.songs]
         if song_id not in songs:
             return None
         query = "DELETE FROM playlist_songs WHERE song_id = ?"
@@ -56,6 +154,7 @@ class Playlist:
 async def get_playlist(db, playlist_id: int):
     query = """
             SELECT playlist_song, playlist_url, song_id,
+                track_id, track_identifier, track_length, track_author,
                 (
                     SELECT playlist_name
                     FROM playlists
@@ -74,10 +173,10 @@ async def get_playlist(db, playlist_id: int):
         return None
 
     playlist_info = {
-        "name": data[0][3],
+        "name": data[0][-1],
         "id": playlist_id,
         "length": len(data),
-        "songs": [(name, url, song_id) for name, url, song_id, _ in data]
+        "songs": [Song(*row[:-1]) for row in data]
     }
     return Playlist(**playlist_info)
     
@@ -85,6 +184,35 @@ async def get_playlist(db, playlist_id: int):
 class Playlists(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.backfill_tracks.start()
+
+    def cog_unload(self):
+        self.backfill_tracks.cancel()
+
+    @tasks.loop(minutes=1)
+    async def backfill_tracks(self):
+        """Stores the track of a batch of songs saved before tracks were stored."""
+        if self.bot.wavelink.get_best_node() is None:
+            return
+        query = "SELECT song_id, playlist_url FROM playlist_songs WHERE track_id IS NULL LIMIT ?"
+        rows = await self.bot.db.fetchall(query, (BACKFILL_BATCH, ))
+        if not rows:
+            return self.backfill_tracks.cancel()
+
+        songs = []
+        for song_id, url in rows:
+            try:
+                tracks = await self.bot.track_cache.get_tracks(url)
+            except Exception as error:
+                # Lavalink is unavailable, try again on the next run
+                return logging.warning(f"Backfilling playlist tracks failed: {error!r}")
+            track = tracks[0] if tracks and not isinstance(tracks, wavelink.TrackPlaylist) else None
+            songs.append((song_id, track))
+        await save_tracks(self.bot.db, songs)
+
+    @backfill_tracks.before_loop
+    async def before_backfill(self):
+        await self.bot.wait_until_ready()
     
         # Playlists -
     async def is_playlistOwner(self, user_id, playlist):
@@ -94,18 +222,15 @@ class Playlists(commands.Cog):
         if not owner:
             return None
         return user_id == owner[0]
-    
-    async def new_id(self):
-        query = "SELECT playlist_id FROM playlists ORDER BY playlist_id DESC"
-        cur = await self.bot.db.execute(query)
-        _id = await cur.fetchone()
-        return (0 if not _id else _id[0]) + 1
-
-    async def new_song_id(self):
-        query = "SELECT song_id FROM playlist_songs ORDER BY song_id DESC"
-        cur = await self.bot.db.execute(query)
-        _id = await cur.fetchone()
-        return (0 if not _id else _id[0]) + 1
+
+    async def count_songs(self, user_id, db=None):
+        """Number of songs in all the playlists of a user."""
+        query = """
+                SELECT Count(*) FROM playlist_songs
+                WHERE playlist_id IN (SELECT playlist_id FROM playlists WHERE user_id = ?)
+                """
+        async with (db or self.bot.db).execute(query, (user_id, )) as cur:
+            return (await cur.fetchone())[0]
     
  
     @commands.group(invoke_without_command=True, case_insensitive=True)
@@ -138,7 +263,7 @@ class Playlists(commands.Cog):
         if not playlist:
             return await ctx.reply(f"{self.bot.icons['redTick']} | No playlist data was found with `ID {playlist_id}` (Empty or does not exist)")
 
-        entries = [f"`ID {tup[2]}`. [{get_title(tup[0])}]({tup[1]})" for tup in playlist.songs]
+        entries = [f"`ID {song.song_id}`. [{get_title(song.name)}]({song.url})" for song in playlist.songs]
         menu = menus.MenuPages(paginations.PlaylistSource(entries, playlist))
         await menu.start(ctx)
     
@@ -151,9 +276,9 @@ class Playlists(commands.Cog):
         if number_of_playlists[0] == 5:
             return await ctx.reply(f"{self.bot.icons['redTick']} | You only can have up to 5 playlists")
         
-        query = "INSERT INTO playlists VALUES (?, ?, ?)"
-        _id = await self.new_id()
-        cur = await self.bot.db.execute(query, (ctx.author.id, name, _id))
+        query = "INSERT INTO playlists (user_id, playlist_name) VALUES (?, ?)"
+        cur = await self.bot.db.execute(query, (ctx.author.id, name))
+        _id = cur.lastrowid
         
         await ctx.reply(f"{self.bot.icons['greenTick']} | Created playlist **{name}** with `ID {_id}`")
 
@@ -176,27 +301,77 @@ class Playlists(commands.Cog):
         elif check is None:
             return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
 
+        if await self.count_songs(ctx.author.id) >= MAX_USER_SONGS:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | You can only have up to {MAX_USER_SONGS} songs across your playlists.")
+
         query.strip('<>')
         if not URL_REG.match(query):
             query = f'ytsearch:{query}'
         
-        tracks = await self.bot.wavelink.get_tracks(query)
+        tracks = await self.bot.track_cache.get_tracks(query)
         
         if not tracks:
             return await ctx.reply(f"{self.bot.icons['redTick']} | The provided song was invalid. Try again with a different URL.")
         
         if isinstance(tracks, wavelink.TrackPlaylist):
-            return await ctx.reply(f"{self.bot.icons['redTick']} | You can not add a playlist to a playlist...")
+            return await ctx.reply(f"{self.bot.icons['redTick']} | You can not add a playlist to a playlist... Use `{ctx.prefix}playlist import` to add its songs.")
         else:
             track = Track(tracks[0].id, tracks[0].info, requester=ctx.author)
             query = """
-                    INSERT INTO playlist_songs
-                    VALUES (?, ?, ?, ?)
+                    INSERT INTO playlist_songs (playlist_id, playlist_song, playlist_url, track_id, track_identifier, track_length, track_author)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
                     """
-            await self.bot.db.execute(query, (playlist_id, track.title, track.uri, await self.new_song_id()))
+            await self.bot.db.execute(query, (playlist_id, track.title, track.uri, track.id, track.identifier, track.length, track.author))
             await ctx.reply(f"{self.bot.icons['plus']} | Added the song **{track.title}** to playlist with `ID {playlist_id}`.\nSong url: <{track.uri}>")
         
     
+    @playlist.command(name="import", usage="<playlist ID> <playlist url>")
+    async def _playlist_import(self, ctx: customContext, playlist_id: int, *, url):
+        """Adds every song of a YouTube or SoundCloud playlist that isn't in the playlist yet."""
+        if (check := await self.is_playlistOwner(ctx.author.id, playlist_id)) is False:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | You do not own this playlist.")
+        elif check is None:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist doesn't seem to exist.")
+
+        if await self.count_songs(ctx.author.id) >= MAX_USER_SONGS:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | You can only have up to {MAX_USER_SONGS} songs across your playlists.")
+
+        url = url.strip('<>')
+        if not URL_REG.match(url):
+            raise commands.BadArgument(f"{self.bot.icons['redTick']} | Please supply the URL of a playlist.")
+
+        tracks = await self.bot.track_cache.get_tracks(url)
+        if not isinstance(tracks, wavelink.TrackPlaylist):
+            return await ctx.reply(f"{self.bot.icons['redTick']} | The provided URL is not a playlist. Use `{ctx.prefix}playlist addsong` for a single song.")
+
+        async with self.bot.db.transaction() as db:
+            query = "SELECT playlist_url, track_id FROM playlist_songs WHERE playlist_id = ?"
+            async with db.execute(query, (playlist_id, )) as cur:
+                existing = {value for row in await cur.fetchall() for value in row if value}
+
+            songs = {}
+            for track in tracks.tracks:
+                if track.uri not in existing and track.id not in existing:
+                    songs.setdefault(track.uri, track)
+
+            # the reply is sent once the transaction ended, so the writer lock isn't held over it
+            room = MAX_USER_SONGS - await self.count_songs(ctx.author.id, db)
+            if len(songs) <= room:
+                query = """
+                        INSERT INTO playlist_songs (playlist_id, playlist_song, playlist_url, track_id, track_identifier, track_length, track_author)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """
+                await db.executemany(query, [
+                    (playlist_id, track.title, track.uri, track.id, track.identifier, track.length, track.author)
+                    for track in songs.values()
+                ])
+
+        if len(songs) > room:
+            return await ctx.reply(f"{self.bot.icons['redTick']} | This playlist has {len(songs)} new songs but you can only add {max(room, 0)} more (up to {MAX_USER_SONGS} across your playlists).")
+
+        skipped = len(tracks.tracks) - len(songs)
+        await ctx.reply(f"{self.bot.icons['plus']} | Imported **{len(songs)}** songs from {tracks.data['playlistInfo']['name']} to playlist with `ID {playlist_id}`." + (f" Skipped {skipped} duplicates." if skipped else ""))
+
     @playlist.command(name="removesong", aliases=["rmsong", "rmsongs"], usage="<playlist ID> <song ID/song IDs>")
     async def _playlist_removesong(self, ctx: customContext, playlist_id:int, *songs):
         if not songs:
@@ -241,7 +416,7 @@ class Playlists(commands.Cog):
             await ctx.invoke(self.bot.get_cog("Music")._connect, invoked_from=ctx.command)
         
         playlist = await get_playlist(self.bot.db, playlist_id)
-        await playlist.play(ctx, self.bot.wavelink, self.bot.get_cog("Music").get_player(ctx), requester=ctx.author, songs=playlist.length)
+        await playlist.play(ctx, self.bot.track_cache, self.bot.get_cog("Music").get_player(ctx), requester=ctx.author, songs=playlist.length)
 
 
 def setup(bot):
@@ -1,133 +1,144 @@
 from utils._type import *
 
-import io
+import aiohttp
+import asyncio
+import collections
+import gzip
+import json
+import logging
 import discord
 import re
 import os
-import zlib
-
-from discord.ext import commands
-from utils.useful import fuzzy, Embed
-
-# Danny's code.
-class SphinxObjectFileReader:
-    # Inspired by Sphinx's InventoryFileReader
-    BUFSIZE = 16 * 1024
-
-    def __init__(self, buffer):
-        self.stream = io.BytesIO(buffer)
-
-    def readline(self):
-        return self.stream.readline().decode('utf-8')
-
-    def skipline(self):
-        self.stream.readline()
-
-    def read_compressed_chunks(self):
-        decompressor = zlib.decompressobj()
-        while True:
-            chunk = self.stream.read(self.BUFSIZE)
-            if len(chunk) == 0:
-                break
-            yield decompressor.decompress(chunk)
-        yield decompressor.flush()
-
-    def read_compressed_lines(self):
-        buf = b''
-        for chunk in self.read_compressed_chunks():
-            buf += chunk
-            pos = buf.find(b'\n')
-            while pos != -1:
-                yield buf[:pos].decode('utf-8')
-                buf = buf[pos + 1:]
-                pos = buf.find(b'\n')
+import time
+
+from discord.ext import commands, tasks
+from pathlib import Path
+from utils.sphinx import parse_inventory_stream
+from utils.fuzzy import FuzzyIndex
+from utils.useful import Embed
+
+# Documentation sets rtfm can search, the first word of the query may be the key or one of the aliases.
+DOCS = {
+    'latest': {'url': 'https://discordpy.readthedocs.io/en/latest', 'aliases': ('dpy',)},
+    'python': {'url': 'https://docs.python.org/3', 'aliases': ('py',)},
+    'master': {'url': 'https://discordpy.readthedocs.io/en/master', 'aliases': ('2.0',)},
+    'aiohttp': {'url': 'https://docs.aiohttp.org/en/stable', 'aliases': ()},
+    'wavelink': {'url': 'https://wavelink.readthedocs.io/en/latest', 'aliases': ('wl',)},
+    'pillow': {'url': 'https://pillow.readthedocs.io/en/stable', 'aliases': ('pil',)},
+}
+DOCS_ALIASES = {alias: key for key, docs in DOCS.items() for alias in (key, *docs['aliases'])}
+
+# inventories older than this are revalidated with a conditional GET
+REFRESH_AFTER = 12 * 60 * 60
 
 class Docs(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-
-    def parse_object_inv(self, stream, url):
-        # key: URL
-        # n.b.: key doesn't have `discord` or `discord.ext.commands` namespaces
-        result = {}
-
-        # first line is version info
-        inv_version = stream.readline().rstrip()
-
-        if inv_version != '# Sphinx inventory version 2':
-            raise RuntimeError('Invalid objects.inv file version.')
-
-        # next line is "# Project: <name>"
-        # then after that is "# Version: <version>"
-        projname = stream.readline().rstrip()[11:]
-        version = stream.readline().rstrip()[11:]
-
-        # next line says if it's a zlib header
-        line = stream.readline()
-        if 'zlib' not in line:
-            raise RuntimeError('Invalid objects.inv file, not z-lib compatible.')
-
-        # This code mostly comes from the Sphinx repository.
-        entry_regex = re.compile(r'(?x)(.+?)\s+(\S*:\S*)\s+(-?\d+)\s+(\S+)\s+(.*)')
-        for line in stream.read_compressed_lines():
-            match = entry_regex.match(line.rstrip())
-            if not match:
-                continue
-
-            name, directive, prio, location, dispname = match.groups()
-            domain, _, subdirective = directive.partition(':')
-            if directive == 'py:module' and name in result:
-                # From the Sphinx Repository:
-                # due to a bug in 1.1 and below,
-                # two inventory entries are created
-                # for Python modules, and the first
-                # one is correct
-                continue
-
-            # Most documentation pages have a label
-            if directive == 'std:doc':
-                subdirective = 'label'
-
-            if location.endswith('$'):
-                location = location[:-1] + name
-
-            key = name if dispname == '-' else dispname
-            prefix = f'{subdirective}:' if domain == 'std' else ''
-
-            if projname == 'discord.py':
-                key = key.replace('discord.ext.commands.', '').replace('discord.', '')
-
-            result[f'{prefix}{key}'] = os.path.join(url, location)
-
-        return result
-
-    async def build_rtfm_lookup_table(self, page_types):
-        cache = {}
-        for key, page in page_types.items():
-            sub = cache[key] = {}
-            async with self.bot.session.get(page + '/objects.inv') as resp:
-                if resp.status != 200:
-                    raise RuntimeError('Cannot build rtfm lookup table, try again later.')
-
-                stream = SphinxObjectFileReader(await resp.read())
-                cache[key] = self.parse_object_inv(stream, page)
-
-        self._rtfm_cache = cache
-
-    async def do_rtfm(self, ctx, key, obj):
-        page_types = {
-            'latest': 'https://discordpy.readthedocs.io/en/latest',
-            'python': 'https://docs.python.org/3',
-            'master': 'https://discordpy.readthedocs.io/en/master',
+        self.path = Path(bot.cwd) / 'data' / 'rtfm'
+        self._rtfm_cache = {}
+        self._rtfm_index = {}
+        self._validators = {}
+        self._locks = collections.defaultdict(asyncio.Lock)
+        self.refresh_inventories.start()
+
+    def cog_unload(self):
+        self.refresh_inventories.cancel()
+
+    def _inventory_path(self, key):
+        return self.path / f'{key}.json.gz'
+
+    def _load_inventory(self, key):
+        """Reads a stored inventory, returns `(validators, entries, age)` or None."""
+        path = self._inventory_path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        url = data['url']
+        entries = {name: f'{url}/{location}' for name, location in data['entries'].items()}
+        return data['validators'], entries, time.time() - path.stat().st_mtime
+
+    def _save_inventory(self, key, url, validators, entries):
+        # locations are stored relative to the docs url, that's most of the size of an inventory
+        data = {
+            'url': url,
+            'validators': validators,
+            'entries': {name: location[len(url) + 1:] for name, location in entries.items()},
         }
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self._inventory_path(key)
+        tmp = path.with_suffix('.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as file:
+            json.dump(data, file, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    async def refresh(self, key, *, force=False):
+        """
+        Makes sure the inventory of `key` is loaded and no older than REFRESH_AFTER.
+        The stored copy is used when it's fresh, otherwise it's revalidated with a conditional GET.
+        """
+        loop = self.bot.loop
+        async with self._locks[key]:
+            age = None
+            if key not in self._rtfm_cache:
+                if (stored := await loop.run_in_executor(None, self._load_inventory, key)) is not None:
+                    self._validators[key], entries, age = stored
+                    self._rtfm_index[key] = await loop.run_in_executor(None, FuzzyIndex, entries)
+                    self._rtfm_cache[key] = entries
+            elif not force:
+                return
+
+            if age is not None and age < REFRESH_AFTER and not force:
+                return
+
+            url = DOCS[key]['url']
+            validators = self._validators.get(key, {})
+            headers = {}
+            if etag := validators.get('etag'):
+                headers['If-None-Match'] = etag
+            if last_modified := validators.get('last_modified'):
+                headers['If-Modified-Since'] = last_modified
+
+            try:
+                async with self.bot.session.get(url + '/objects.inv', headers=headers) as resp:
+                    if resp.status == 304 and key in self._rtfm_cache:
+                        # still up to date, only bump the age of the stored copy
+                        await loop.run_in_executor(None, os.utime, self._inventory_path(key))
+                        return
+                    if resp.status != 200:
+                        raise RuntimeError('Cannot build rtfm lookup table, try again later.')
+
+                    validators = {'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified')}
+                    entries = await parse_inventory_stream(resp.content, url)
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as error:
+                if key not in self._rtfm_cache:
+                    raise
+                # a stale inventory still answers better than an error
+                logging.warning(f"Could not revalidate the {key} rtfm inventory, keeping the stored one: {error!r}")
+                return
+
+            await loop.run_in_executor(None, self._save_inventory, key, url, validators, entries)
+            self._rtfm_index[key] = await loop.run_in_executor(None, FuzzyIndex, entries)
+            self._rtfm_cache[key] = entries
+            self._validators[key] = validators
+
+    @tasks.loop(seconds=REFRESH_AFTER)
+    async def refresh_inventories(self):
+        results = await asyncio.gather(*(self.refresh(key, force=key in self._rtfm_cache) for key in DOCS), return_exceptions=True)
+        for key, result in zip(DOCS, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Could not refresh the {key} rtfm inventory: {result!r}")
 
+    async def do_rtfm(self, ctx, key, obj):
         if obj is None:
-            await ctx.send(page_types[key])
+            await ctx.send(DOCS[key]['url'])
             return
 
-        if not hasattr(self, '_rtfm_cache'):
+        if key not in self._rtfm_cache:
             await ctx.trigger_typing()
-            await self.build_rtfm_lookup_table(page_types)
+            await self.refresh(key)
 
         obj = re.sub(r'^(?:discord\.(?:ext\.)?)?(?:commands\.)?(.+)', r'\1', obj)
 
@@ -141,12 +152,7 @@ class Docs(commands.Cog):
                     obj = f'abc.Messageable.{name}'
                     break
 
-        cache = list(self._rtfm_cache[key].items())
-
-        def transform(tup):
-            return tup[0]
-
-        matches = fuzzy.finder(obj, cache, key=lambda t: t[0], lazy=False)[:8]
+        matches = self._rtfm_index[key].search(obj, limit=8)
 
         e = Embed()
         if len(matches) == 0:
@@ -157,23 +163,19 @@ class Docs(commands.Cog):
 
 
 
-    @commands.group(aliases=['rtfd'], invoke_without_command=True)
+    @commands.command(aliases=['rtfd'], usage='[docs] [object]')
     async def rtfm(self, ctx, *, obj: str = None):
         """Gives you a documentation link for a discord.py entity.
         Events, objects, and functions are all supported through a
         a cruddy fuzzy algorithm.
+        Start with `python`, `master`, `aiohttp`, `wavelink` or `pillow` to search those docs instead.
         """
-        await self.do_rtfm(ctx, 'latest', obj)
-
-    @rtfm.command(name='python', aliases=['py'])
-    async def rtfm_python(self, ctx, *, obj: str = None):
-        """Gives you a documentation link for a Python entity."""
-        await self.do_rtfm(ctx, 'python', obj)
-
-    @rtfm.command(name='master', aliases=['2.0'])
-    async def rtfm_master(self, ctx, *, obj: str = None):
-        """Gives you a documentation link for a discord.py entity (master branch)"""
-        await self.do_rtfm(ctx, 'master', obj)
+        key = 'latest'
+        if obj is not None:
+            first, _, rest = obj.partition(' ')
+            if first.lower() in DOCS_ALIASES:
+                key, obj = DOCS_ALIASES[first.lower()], rest.strip() or None
+        await self.do_rtfm(ctx, key, obj)
 
 def setup(bot):
     bot.add_cog(Docs(bot), cat_name="Information")
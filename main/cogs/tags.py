@@ -5,11 +5,18 @@ import sqlite3
 import time
 
 from discord.ext import commands
+from utils.fuzzy import FuzzyIndex
 
 
 class Tags(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # tag names of the guilds that recently looked up a missing tag
+        self.names = bot.cache.namespace("tag_names", maxsize=500, loader=self.load_names)
+
+    async def load_names(self, guild_id):
+        cur = await self.bot.db.execute("SELECT tag_name FROM tags WHERE tag_guild_id = ?", (guild_id,))
+        return FuzzyIndex((name, None) for name, in await cur.fetchall())
 
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def tag(self, ctx: customContext, *, tag):
@@ -20,15 +27,12 @@ class Tags(commands.Cog):
         row = await cur.fetchone()
 
         if not row:
-            cur = await self.bot.db.execute(
-                "SELECT tag_name FROM tags WHERE tag_guild_id = ? AND tag_name LIKE ?",
-                (ctx.guild.id, f"%{tag}%"),
-            )
-            row = await cur.fetchall()
-            if not row:
+            index = await self.names.load(ctx.guild.id)
+            matches = index.search(tag, limit=10)
+            if not matches:
                 return await ctx.send("Tag not found.")
             else:
-                names = "\n".join(r[0] for r in row)
+                names = "\n".join(name for name, _ in matches)
                 return await ctx.send(f"Tag not found. Did you mean...\n{names}")
 
         await ctx.send(row[0])
@@ -74,8 +78,10 @@ class Tags(commands.Cog):
         except sqlite3.IntegrityError:
             await ctx.send(f"{self.bot.icons['redTick']} That tag already exists!")
         else:
+            if (index := self.names.peek(ctx.guild.id)) is not None:
+                index.add(tag)
             return await ctx.send(
-                f"{self.bot.icons['greenTick']} Done! Created tag **{tag}**. `{await self.bot.get_prefix(ctx.message)}tag {tag}`"
+                f"{self.bot.icons['greenTick']} Done! Created tag **{tag}**. `{ctx.prefix}tag {tag}`"
             )
 
     @tag.command()
@@ -100,6 +106,8 @@ class Tags(commands.Cog):
 
         query = "DELETE FROM tags WHERE tag_name = ? AND tag_guild_id = ?"
         cur = await self.bot.db.execute(query, (tag, ctx.guild.id))
+        if (index := self.names.peek(ctx.guild.id)) is not None:
+            index.remove(tag)
         return await ctx.send(f"{self.bot.icons['greenTick']} Deleted tag `{tag}`.")
 
 
@@ -1,15 +1,15 @@
 from utils._type import *
 
-import asyncio
 import datetime
 import random
 import discord
 import json
 
-from discord.ext import commands
+from discord.ext import commands, tasks
 from humanize.time import precisedelta
 from PIL import Image, ImageDraw, ImageFont
 from typing import Union
+from utils.snipes import SnipeStore
 from utils.useful import Embed, detect, get_grole
 from wonderwords import RandomSentence, RandomWord
 
@@ -18,37 +18,32 @@ class Utilities(commands.Cog, description="Handy dandy utils"):
     def __init__(self, bot):
         self.bot = bot
         self.index = 0
-        self.snipe_cache = {}
-        self.esnipe_cache = {}
+        self.snipe_cache = SnipeStore()
+        self.esnipe_cache = SnipeStore()
+        self.expire_snipes.start()
+
+    def cog_unload(self):
+        self.expire_snipes.cancel()
+
+    @tasks.loop(seconds=30)
+    async def expire_snipes(self):
+        self.snipe_cache.expire()
+        self.esnipe_cache.expire()
+
+    def get_snipe_author(self, ctx: customContext, author_id):
+        return (ctx.guild and ctx.guild.get_member(author_id)) or self.bot.get_user(author_id)
 
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
-        message = after
-        if message.author.bot:
+        if after.author.bot or before.content == after.content:
             return
-        
-        try:
-            cache = self.esnipe_cache[message.channel.id]
-        except KeyError:
-            cache = self.esnipe_cache[message.channel.id] = []
-        
-        cache.append({"author": before.author, "before_content": before.content, "after_content": message.content, "message_obj": message})
-        await asyncio.sleep(300)
-        del cache[cache.index({"author": before.author, "before_content": before.content, "after_content": message.content})]
+        self.esnipe_cache.add(after.channel.id, after, before=before.content)
 
     @commands.Cog.listener()
     async def on_message_delete(self, message):
         if message.author.bot:
             return
-        try:
-            cache = self.snipe_cache[message.channel.id]
-        except KeyError:
-            cache = self.snipe_cache[message.channel.id] = []
-        
-        cache.append(message)
-
-        await asyncio.sleep(300)
-        del cache[cache.index(message)]
+        self.snipe_cache.add(message.channel.id, message)
 
     @commands.command(name="snipe", brief="Retrieves a recent deleted message")
     async def snipe(self, ctx: customContext, index=1):
@@ -57,15 +52,10 @@ class Utilities(commands.Cog, description="Handy dandy utils"):
         Only returns the most recent message.
         A bot's deleted message is ignored.
         """
-        try:
-            cache = self.snipe_cache[ctx.channel.id]
-        except KeyError:
-            raise commands.BadArgument("There's nothing to snipe here.")
-
-        try:
-            message = cache[index-1]
-        except IndexError:
+        cache = self.snipe_cache.get(ctx.channel.id)
+        if not 0 < index <= len(cache):
             raise commands.BadArgument("There's nothing to snipe here.")
+        message = cache[index-1]
 
         em = Embed(
             title=f"Last deleted message in #{ctx.channel.name}",
@@ -74,10 +64,11 @@ class Utilities(commands.Cog, description="Handy dandy utils"):
             colour=discord.Color.random(),
             url=message.jump_url
         )
-        em.set_author(
-            name=message.author,
-            icon_url=message.author.avatar_url
-        )
+        if author := self.get_snipe_author(ctx, message.author_id):
+            em.set_author(
+                name=author,
+                icon_url=author.avatar_url
+            )
         em.set_footer(text=f"Sniped by: {ctx.author} | Index {index}/{len(cache)}")
         await ctx.send(embed=em)
 
@@ -87,29 +78,25 @@ class Utilities(commands.Cog, description="Handy dandy utils"):
         Same as `snipe`, but for edited messages.
         A bot's edited message is ignored.
         """
-        try:
-            cache = self.esnipe_cache[ctx.channel.id]
-        except KeyError:
-            raise commands.BadArgument("There's nothing to snipe here.")
-
-        try:
-            message = cache[index-1]
-        except IndexError:
+        cache = self.esnipe_cache.get(ctx.channel.id)
+        if not 0 < index <= len(cache):
             raise commands.BadArgument("There's nothing to snipe here.")
+        message = cache[index-1]
 
         em = Embed(
             title=f"Last edited message in #{ctx.channel.name}",
             description="**Before:**\n"
-            f"+ {message['before_content']}\n"
-            f"\n**After:**\n- {message['after_content']}",
+            f"+ {message.before}\n"
+            f"\n**After:**\n- {message.content}",
             timestamp=datetime.datetime.utcnow(),
             colour=discord.Color.random(),
-            url=message['message_obj'].jump_url
-        )
-        em.set_author(
-            name=message['author'],
-            icon_url=message['author'].avatar_url
+            url=message.jump_url
         )
+        if author := self.get_snipe_author(ctx, message.author_id):
+            em.set_author(
+                name=author,
+                icon_url=author.avatar_url
+            )
 
         em.set_footer(text=f"Sniped by: {ctx.author} | Index {index}/{len(cache)}")
         await ctx.send(embed=em)
@@ -1,29 +1,29 @@
-CREATE TABLE guilds (
+CREATE TABLE IF NOT EXISTS guilds (
     guild_id BIGINT PRIMARY KEY
-)
+);
 
-CREATE TABLE usage (
+CREATE TABLE IF NOT EXISTS usage (
     command TEXT PRIMARY KEY,
     counter INTEGER
-)
+);
 
-CREATE TABLE frozen_names(
+CREATE TABLE IF NOT EXISTS frozen_names(
     guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
     user_id BIGINT,
     frozen_name VARCHAR(32),
     PRIMARY KEY (guild_id, user_id)
-)
+);
 
-CREATE TABLE "guild_config" (
+CREATE TABLE IF NOT EXISTS "guild_config" (
     guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
     prefix VARCHAR DEFAULT 'g.',
     grole BIGINT,
     premium BOOL DEFAULT 'FALSE', blacklisted BOOL DEFAULT "FALSE", 
     PRIMARY KEY (guild_id)
-)
+);
 
 
-CREATE TABLE tags (
+CREATE TABLE IF NOT EXISTS tags (
     tag_guild_id BIGINT REFERENCES guilds ON DELETE CASCADE, 
     tag_name VARCHAR(32),
     tag_content TEXT NOT NULL,
@@ -33,24 +33,24 @@ CREATE TABLE tags (
     tag_aliases TEXT [],
     UNIQUE(tag_guild_id, tag_name),
     PRIMARY KEY(tag_guild_id, tag_name, tag_aliases)
-)
+);
 
-CREATE TABLE users_data (
+CREATE TABLE IF NOT EXISTS users_data (
     user_id BIGINT,
     commands_ran BIGINT,
     blacklisted BOOL DEFAULT "FALSE",
     tips BOOL DEFAULT "FALSE",
     premium BOOL DEFAULT "FALSE",
     PRIMARY KEY (user_id)
-)
+);
 
-CREATE TABLE disabled_commands (
+CREATE TABLE IF NOT EXISTS disabled_commands (
     snowflake_id BIGINT,
     command_name TEXT,
     PRIMARY KEY(snowflake_id, command_name)
-)
+);
 
-CREATE TABLE currency_data (
+CREATE TABLE IF NOT EXISTS currency_data (
     user_id BIGINT PRIMARY KEY UNIQUE,
     wallet INT DEFAULT 200,
     bank INT DEFAULT 200,
@@ -59,32 +59,32 @@ CREATE TABLE currency_data (
     exp INT DEFAULT 0,
     lvl INT DEFAULT 0,
     prestige INT NOT NULL DEFAULT 0
-)
+);
 
-CREATE TABLE "item_info" (
+CREATE TABLE IF NOT EXISTS "item_info" (
     item_id INTEGER PRIMARY KEY NOT NULL,
     item_price INTEGER NOT NULL,
     item_name TEXT NOT NULL,
     item_description TEXT NOT NULL,
     item_brief TEXT
-)
+);
 
-CREATE TABLE user_Inventory(
+CREATE TABLE IF NOT EXISTS user_Inventory(
     user_id BIGINT NOT NULL,
     item_id INT NOT NULL,
     amount INT, 
     PRIMARY KEY (user_id, item_id)
-) 
+);
 
-CREATE TABLE playlists (
+CREATE TABLE IF NOT EXISTS playlists (
     user_id BIGINT NOT NULL,
     playlist_name VARTEXT(32) NOT NULL,
     playlist_id INT NOT NULL
-)
+);
 
-CREATE TABLE playlist_songs (
+CREATE TABLE IF NOT EXISTS playlist_songs (
     playlist_id INT NOT NULL,
     playlist_song TEXT NOT NULL,
     playlist_url TEXT NOT NULL,
     song_id INT NOT NULL DEFAULT -1
-)
\ No newline at end of file
+);
@@ -0,0 +1,52 @@
+-- playlists sharing an id can't be renumbered, their songs only point at the id and could belong to either one.
+-- they have to be split by hand, the migration stops before touching anything until then
+CREATE TEMP TABLE duplicate_playlists (playlist_id INT);
+
+CREATE TEMP TRIGGER duplicate_playlists_abort BEFORE INSERT ON duplicate_playlists
+BEGIN
+    SELECT RAISE(ABORT, 'playlists has rows sharing a playlist_id, give them unique ids and move their songs before migrating');
+END;
+
+INSERT INTO duplicate_playlists
+SELECT playlist_id FROM playlists GROUP BY playlist_id HAVING count(*) > 1;
+
+DROP TABLE duplicate_playlists;
+
+-- playlist ids are allocated by SQLite instead of ORDER BY ... DESC over the whole table
+CREATE TABLE playlists_new (
+    user_id BIGINT NOT NULL,
+    playlist_name VARTEXT(32) NOT NULL,
+    playlist_id INTEGER PRIMARY KEY AUTOINCREMENT
+);
+
+INSERT INTO playlists_new (user_id, playlist_name, playlist_id)
+SELECT user_id, playlist_name, playlist_id FROM playlists;
+
+DROP TABLE playlists;
+ALTER TABLE playlists_new RENAME TO playlists;
+
+-- rows without a valid or unique song_id get a fresh one, after the valid ones are copied
+CREATE TABLE playlist_songs_new (
+    playlist_id INT NOT NULL,
+    playlist_song TEXT NOT NULL,
+    playlist_url TEXT NOT NULL,
+    song_id INTEGER PRIMARY KEY AUTOINCREMENT
+);
+
+INSERT INTO playlist_songs_new (playlist_id, playlist_song, playlist_url, song_id)
+SELECT playlist_id, playlist_song, playlist_url, new_id
+FROM (
+    SELECT playlist_id, playlist_song, playlist_url, rowid AS old_rowid,
+        CASE
+            WHEN song_id > 0 AND row_number() OVER (PARTITION BY song_id ORDER BY rowid) = 1 THEN song_id
+        END AS new_id
+    FROM playlist_songs
+)
+ORDER BY new_id IS NULL, old_rowid;
+
+DROP TABLE playlist_songs;
+ALTER TABLE playlist_songs_new RENAME TO playlist_songs;
+
+CREATE INDEX playlists_user_id_idx ON playlists (user_id);
+CREATE INDEX playlist_songs_playlist_id_idx ON playlist_songs (playlist_id);
+CREATE INDEX item_info_lower_name_idx ON item_info (lower(item_name));
@@ -0,0 +1,16 @@
+-- rows are removed as soon as their amount drops to zero instead of on every currency command
+DELETE FROM user_Inventory WHERE amount <= 0;
+
+CREATE TRIGGER user_Inventory_drop_empty_update
+AFTER UPDATE OF amount ON user_Inventory
+WHEN NEW.amount <= 0
+BEGIN
+    DELETE FROM user_Inventory WHERE user_id = NEW.user_id AND item_id = NEW.item_id;
+END;
+
+CREATE TRIGGER user_Inventory_drop_empty_insert
+AFTER INSERT ON user_Inventory
+WHEN NEW.amount <= 0
+BEGIN
+    DELETE FROM user_Inventory WHERE user_id = NEW.user_id AND item_id = NEW.item_id;
+END;
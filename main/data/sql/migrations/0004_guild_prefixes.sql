@@ -0,0 +1,11 @@
+-- a guild can have several prefixes, guilds without a row use the default one
+CREATE TABLE guild_prefixes (
+    guild_id BIGINT REFERENCES guilds ON DELETE CASCADE,
+    prefix VARCHAR NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, prefix)
+);
+
+INSERT INTO guild_prefixes (guild_id, prefix, position)
+SELECT guild_id, prefix, 0 FROM guild_config
+WHERE prefix IS NOT NULL AND prefix != '' AND prefix != 'g.';
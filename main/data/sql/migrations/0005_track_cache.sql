@@ -0,0 +1,8 @@
+-- resolved Lavalink queries, see utils/tracks.py
+CREATE TABLE track_cache (
+    query TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+
+CREATE INDEX track_cache_resolved_at_idx ON track_cache (resolved_at);
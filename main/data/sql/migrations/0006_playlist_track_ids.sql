@@ -0,0 +1,8 @@
+-- the resolved Lavalink track of a playlist song, so playing a playlist needs no search.
+-- track_id is NULL until the song is resolved and '' if it couldn't be
+ALTER TABLE playlist_songs ADD COLUMN track_id TEXT;
+ALTER TABLE playlist_songs ADD COLUMN track_identifier TEXT;
+ALTER TABLE playlist_songs ADD COLUMN track_length INTEGER;
+ALTER TABLE playlist_songs ADD COLUMN track_author TEXT;
+
+CREATE INDEX playlist_songs_unresolved_idx ON playlist_songs (track_id) WHERE track_id IS NULL;
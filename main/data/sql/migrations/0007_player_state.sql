@@ -0,0 +1,15 @@
+-- music players saved periodically and before a restart, restored when the bot is back.
+-- tracks is a JSON list of the current track followed by the queue
+CREATE TABLE player_state (
+    guild_id BIGINT PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    text_channel_id BIGINT NOT NULL,
+    dj_id BIGINT,
+    volume INTEGER NOT NULL DEFAULT 100,
+    looping BOOLEAN NOT NULL DEFAULT 0,
+    loop_queue BOOLEAN NOT NULL DEFAULT 0,
+    paused BOOLEAN NOT NULL DEFAULT 0,
+    position INTEGER NOT NULL DEFAULT 0,
+    tracks TEXT NOT NULL,
+    saved_at REAL NOT NULL
+);
@@ -0,0 +1,310 @@
+"""Benchmarks runnable with `dev bench <name>`.
+
+Every benchmark is a coroutine taking the bot and returning `(headers, rows)`
+so the result can be rendered with tabulate.
+"""
+import asyncio
+import io
+import itertools
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+import types
+import zlib
+
+import wavelink
+
+from utils.cache import CacheManager
+from utils.database import Database
+from utils.fake_lavalink import pool_migrations
+from utils.flusher import Flusher
+from utils.fuzzy import FuzzyIndex
+from utils.prefix import Prefixes, PrefixResolver
+from utils.sphinx import ENTRY_REGEX, parse_inventory, parse_inventory_stream
+from utils.tracks import TrackQueue
+from utils.useful import convert, currencyData, fuzzy
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+@benchmark("db")
+async def database_reads(bot, rows=200_000):
+    """Read latency while a large currency flush is running, single connection vs the WAL pool."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for readers in (0, 4):
+            db = await Database.connect(os.path.join(tmp, f"bench_{readers}.sqlite3"), readers=readers)
+            await db.execute("CREATE TABLE currency_data (user_id BIGINT PRIMARY KEY, wallet INT, bank INT)")
+            async with db.transaction() as conn:
+                await conn.executemany(
+                    "INSERT INTO currency_data VALUES (?, ?, ?)",
+                    ((i, 200, 200) for i in range(rows)),
+                )
+
+            async def flush():
+                async with db.transaction() as conn:
+                    await conn.executemany(
+                        "UPDATE currency_data SET wallet = ?, bank = ? WHERE user_id = ?",
+                        ((random.randint(0, 10**6), 200, i) for i in range(rows)),
+                    )
+
+            samples = []
+            start = time.perf_counter()
+            task = asyncio.create_task(flush())
+            while not task.done():
+                before = time.perf_counter()
+                await db.fetchone("SELECT wallet FROM currency_data WHERE user_id = ?", (random.randrange(rows),))
+                samples.append((time.perf_counter() - before) * 1000)
+            await task
+            flush_time = (time.perf_counter() - start) * 1000
+            await db.close()
+
+            mode = f"WAL, {readers} readers" if readers else "single connection"
+            results.append((mode, len(samples), round(percentile(samples, 50), 2), round(percentile(samples, 99), 2), round(flush_time)))
+
+    return ("mode", "reads", "p50 ms", "p99 ms", "flush ms"), results
+
+
+@benchmark("bal")
+async def balance_before_invoke(bot, rows=1_000_000, users=1000, runs=20):
+    """Currency.cog_before_invoke on a 1M row inventory, with and without the old inventory DELETE.
+
+    Both time the real `currencyData.create_account` lookup on a warm users cache.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await Database.connect(os.path.join(tmp, "bench.sqlite3"), readers=0)
+        await db.execute("CREATE TABLE user_Inventory (user_id BIGINT NOT NULL, item_id INT NOT NULL, amount INT, PRIMARY KEY (user_id, item_id))")
+        await db.execute("CREATE TABLE currency_data (user_id BIGINT PRIMARY KEY, wallet INT DEFAULT 200, bank INT DEFAULT 200, max_bank INT DEFAULT 200, boost INT DEFAULT 1, exp INT DEFAULT 0, lvl INT DEFAULT 0, prestige INT DEFAULT 0)")
+        async with db.transaction() as conn:
+            await conn.executemany(
+                "INSERT INTO user_Inventory VALUES (?, ?, ?)",
+                ((i // 20, i % 20, random.randint(1, 10)) for i in range(rows)),
+            )
+            await conn.executemany("INSERT INTO currency_data (user_id) VALUES (?)", ((i,) for i in range(users)))
+
+        fake = types.SimpleNamespace(db=db, cache=CacheManager())
+        fake.flusher = Flusher(fake)
+        data = currencyData(fake)
+        fake.cache.namespace("users", loader=data.fetch_account)
+        for user_id in range(users):
+            await data.get_account(user_id)
+
+        async def before(user_id):
+            await db.execute("DELETE FROM user_Inventory WHERE amount = 0")
+            return await data.create_account(user_id)
+
+        async def after(user_id):
+            return await data.create_account(user_id)
+
+        for name, func in (("DELETE per invoke", before), ("cached account", after)):
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await func(random.randrange(users))
+                samples.append((time.perf_counter() - start) * 1000)
+            results.append((name, runs, round(percentile(samples, 50), 3), round(percentile(samples, 99), 3)))
+        await db.close()
+
+    return ("before_invoke", "runs", "p50 ms", "p99 ms"), results
+
+
+@benchmark("prefix")
+async def prefix_resolution(bot, messages=200_000, guilds=1000):
+    """Messages per second through get_prefix with a warm cache, old per-message re.compile vs PrefixResolver."""
+    custom = {guild_id: "?" if guild_id % 10 else "!!" for guild_id in range(0, guilds, 7)}
+    old_cache = {guild_id: custom.get(guild_id, "g.") for guild_id in range(guilds)}
+
+    def old(guild_id, content):
+        prefix = old_cache[guild_id]
+        comp = re.compile(f"^({re.escape(prefix)}).*", flags=re.I)
+        match = comp.match(content)
+        if match is not None:
+            return match.group(1)
+        return prefix
+
+    resolver = PrefixResolver(bot)
+    resolver.guilds = {guild_id: Prefixes([prefix]) for guild_id, prefix in custom.items()}
+
+    def new(guild_id, content):
+        prefixes = resolver.get(guild_id)
+        return prefixes.match(content) or prefixes.first
+
+    traffic = {
+        "command": [(g, f"{old_cache[g].upper()}balance") for g in range(guilds)],
+        "chat": [(g, "hello there, how is everyone doing today?") for g in range(guilds)],
+    }
+    results = []
+    for kind, samples in traffic.items():
+        for name, func in (("re.compile per message", old), ("PrefixResolver", new)):
+            start = time.perf_counter()
+            for i in range(messages):
+                func(*samples[i % guilds])
+            elapsed = time.perf_counter() - start
+            results.append((kind, name, round(messages / elapsed), round(elapsed / messages * 10**6, 2)))
+
+    return ("traffic", "get_prefix", "messages/s", "us/message"), results
+
+
+def _old_parse_inventory(buffer, url):
+    """The reader and parser rtfm used before utils.sphinx, kept for comparison."""
+    stream = io.BytesIO(buffer)
+    for _ in range(4):
+        stream.readline()
+
+    def lines():
+        decompressor = zlib.decompressobj()
+        buf = b''
+        for chunk in itertools.chain(iter(lambda: decompressor.decompress(stream.read(16 * 1024)), b''), [decompressor.flush()]):
+            buf += chunk
+            pos = buf.find(b'\n')
+            while pos != -1:
+                yield buf[:pos].decode('utf-8')
+                buf = buf[pos + 1:]
+                pos = buf.find(b'\n')
+
+    result = {}
+    for line in lines():
+        if match := ENTRY_REGEX.match(line.rstrip()):
+            name, directive, _, location, dispname = match.groups()
+            domain, _, subdirective = directive.partition(':')
+            if location.endswith('$'):
+                location = location[:-1] + name
+            key = name if dispname == '-' else dispname
+            prefix = f'{subdirective}:' if domain == 'std' else ''
+            result[f'{prefix}{key}'] = os.path.join(url, location)
+    return result
+
+
+@benchmark("rtfm")
+async def inventory_parsing(bot, url="https://docs.python.org/3", runs=5):
+    """Parse time and peak memory of the Python stdlib objects.inv, old reader vs utils.sphinx."""
+    async with bot.session.get(url + "/objects.inv") as resp:
+        buffer = await resp.read()
+
+    async def streamed():
+        async with bot.session.get(url + "/objects.inv") as resp:
+            return await parse_inventory_stream(resp.content, url)
+
+    async def buffered(parse):
+        return parse(buffer, url)
+
+    results = []
+    for name, func in (
+        ("old reader + regex", lambda: buffered(_old_parse_inventory)),
+        ("LineDecoder, buffered", lambda: buffered(parse_inventory)),
+        ("LineDecoder, streamed", streamed),
+    ):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            entries = await func()
+            samples.append((time.perf_counter() - start) * 1000)
+
+        del entries
+        tracemalloc.start()
+        entries = await func()
+        # what's left traced at the end is the lookup table itself, the rest of the peak is the parsing overhead
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append((
+            name,
+            len(entries),
+            round(percentile(samples, 50), 1),
+            round(peak / 1024 / 1024, 2),
+            round((peak - current) / 1024 / 1024, 2),
+        ))
+
+    headers = (f"parser ({len(buffer) // 1024} KiB inventory)", "entries", "p50 ms", "peak MiB", "overhead MiB")
+    return headers, results
+
+
+@benchmark("fuzzy")
+async def fuzzy_search(bot, sizes=(10_000, 100_000), runs=20):
+    """Top 8 fuzzy matches on rtfm-like names, fuzzy.finder vs FuzzyIndex."""
+    rng = random.Random(0)
+    words = ["message", "channel", "guild", "member", "role", "embed", "client", "context", "command", "voice", "user", "permissions"]
+    queries = ["msg", "channel.send", "guildmember", "embed.add_field", "ctx.reply", "perms", "voiceclient"]
+    results = []
+    for size in sizes:
+        names = {
+            f"{rng.choice(words)}.{rng.choice(words).title()}{i}.{rng.choice(words)}_{rng.choice(['add', 'send', 'edit', 'fetch', 'field', 'reply'])}": i
+            for i in range(size)
+        }
+        start = time.perf_counter()
+        index = FuzzyIndex(names)
+        build = (time.perf_counter() - start) * 1000
+
+        for name, func in (
+            ("fuzzy.finder", lambda q: fuzzy.finder(q, list(names.items()), key=lambda t: t[0], lazy=False)[:8]),
+            ("FuzzyIndex", lambda q: index.search(q, limit=8)),
+        ):
+            samples = []
+            for i in range(runs):
+                query = queries[i % len(queries)]
+                before = time.perf_counter()
+                func(query)
+                samples.append((time.perf_counter() - before) * 1000)
+            results.append((
+                size,
+                name,
+                round(build) if name == "FuzzyIndex" else None,
+                round(percentile(samples, 50), 2),
+                round(percentile(samples, 99), 2),
+            ))
+
+    return ("entries", "search", "build ms", "p50 ms", "p99 ms"), results
+
+
+@benchmark("queue")
+async def queue_pages(bot, sizes=(1_000, 10_000), runs=20):
+    """Rendering the first page of the queue command, asyncio.Queue vs TrackQueue."""
+    results = []
+    for size in sizes:
+        tracks = [
+            wavelink.Track(str(i), {"title": f"Song {i}", "identifier": str(i), "uri": f"https://youtu.be/{i}", "length": 180_000 + i})
+            for i in range(size)
+        ]
+        old = asyncio.Queue()
+        for track in tracks:
+            old.put_nowait(track)
+        new = TrackQueue()
+        new.extend(tracks)
+
+        def old_page():
+            entries = [f"**{i+1}**. [{track.title}]({track.uri}) | `{convert(int(track.length))}`" for i, track in enumerate(old._queue, start=1)]
+            return entries[:10]
+
+        def new_page():
+            return [f"**{i}**. [{track.title}]({track.uri}) | `{convert(int(track.length))}`" for i, track in enumerate(new[0:10], start=2)]
+
+        for name, func in (("asyncio.Queue", old_page), ("TrackQueue", new_page)):
+            samples = []
+            for _ in range(runs):
+                before = time.perf_counter()
+                func()
+                samples.append((time.perf_counter() - before) * 1000)
+            results.append((size, name, round(percentile(samples, 50), 3), round(percentile(samples, 99), 3)))
+
+    return ("tracks", "queue", "p50 ms", "p99 ms"), results
+
+
+@benchmark("nodes")
+async def node_migrations(bot, players=20):
+    """NodePool.rebalance against fake Lavalink nodes, a degraded node, a lost one and one coming up late."""
+    return await pool_migrations(players=players)
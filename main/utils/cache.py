@@ -1,6 +1,28 @@
+import asyncio
+import collections.abc
+import sys
+import time
+
 from datetime import datetime
 
+
+def sizeof(obj, depth=2):
+    """Approximate memory used by an object and, up to `depth` levels, what it contains."""
+    size = sys.getsizeof(obj)
+    if depth:
+        if isinstance(obj, collections.abc.Mapping):
+            size += sum(sizeof(k, depth - 1) + sizeof(v, depth - 1) for k, v in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += sum(sizeof(item, depth - 1) for item in obj)
+    return size
+
+
 class CacheManager(dict):
+    """The bot's caches, by name.
+
+    Namespaces made with `namespace` are LRU/LFU caches with their own size,
+    lifetime and loader. Anything else can still be stored as a plain value.
+    """
 
     def __init__(self):
         pass
@@ -18,9 +40,213 @@ class CacheManager(dict):
 
     def __setitem__(self, key, value):
         return super().__setitem__(key, value)
-    
+
     def __getitem__(self, key):
         return super().__getitem__(key)
 
     def get(self, key, default=None):
-        return super().get(key, default)
\ No newline at end of file
+        return super().get(key, default)
+
+    def namespace(self, name, *, policy="lru", **kwargs):
+        """Creates (or replaces) the cache `name`, see LRUCache for the keyword arguments."""
+        cache = POLICIES[policy](**kwargs)
+        self[name] = cache
+        return cache
+
+    def expire(self):
+        """Expires every namespace and returns how many entries were evicted."""
+        return sum(cache.expire() for cache in self.values() if isinstance(cache, LRUCache))
+
+    def stats(self):
+        """Returns the statistics of every cache, plain values only report their size and memory."""
+        stats = {}
+        for name, cache in self.items():
+            if isinstance(cache, LRUCache):
+                stats[name] = cache.stats
+            else:
+                stats[name] = {"size": len(cache) if hasattr(cache, "__len__") else None, "memory": sizeof(cache)}
+        return stats
+
+
+class LRUCache(collections.abc.MutableMapping):
+    """Mapping that keeps at most `maxsize` entries, evicting the least recently accessed first.
+
+    Entries that weren't accessed for `max_age` seconds or were set more than
+    `ttl` seconds ago are evicted by `expire`, entries past their `ttl` are
+    also treated as missing when read.
+    `on_evict(key, value)` is called for every evicted entry, but not for deleted ones.
+    `loader(key)` is the coroutine `load` uses to fill misses, it may return None if there is nothing to cache.
+    Membership checks and `peek` don't count as an access.
+    """
+
+    def __init__(self, maxsize=None, *, max_age=None, ttl=None, loader=None, on_evict=None):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.ttl = ttl
+        self.loader = loader
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+        self._data = collections.OrderedDict()
+        self._accessed = {}
+        self._written = {}
+        self._loading = {}
+
+    def __getitem__(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        if self.ttl is not None and self._written[key] < time.monotonic() - self.ttl:
+            self._evict(key)
+            self.misses += 1
+            raise KeyError(key)
+        self.hits += 1
+        self._touch(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._written[key] = time.monotonic()
+        self._touch(key)
+        while self.maxsize is not None and len(self._data) > self.maxsize:
+            self._evict(self._victim())
+
+    def __delitem__(self, key):
+        del self._data[key]
+        del self._accessed[key]
+        del self._written[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} size={len(self)} maxsize={self.maxsize} max_age={self.max_age} ttl={self.ttl}>"
+
+    def _touch(self, key):
+        self._data.move_to_end(key)
+        self._accessed[key] = time.monotonic()
+
+    def _victim(self):
+        return next(iter(self._data))
+
+    def _evict(self, key):
+        value = self._data[key]
+        del self[key]
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def setdefault(self, key, default=None):
+        if key in self._data:
+            self._touch(key)
+            return self._data[key]
+        self[key] = default
+        return default
+
+    def peek(self, key, default=None):
+        return self._data.get(key, default)
+
+    async def load(self, key):
+        """Returns the cached value, calling the loader on a miss.
+
+        Concurrent misses for the same key share one loader call, cancelling
+        one of the callers doesn't cancel it for the others.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            if self.loader is None:
+                raise
+
+        if (task := self._loading.get(key)) is None:
+            task = self._loading[key] = asyncio.ensure_future(self._load(key))
+        return await asyncio.shield(task)
+
+    async def _load(self, key):
+        try:
+            value = await self.loader(key)
+            self.loads += 1
+            return value if value is None else self.setdefault(key, value)
+        finally:
+            del self._loading[key]
+
+    def expire(self):
+        """Evicts the entries older than `max_age` or `ttl` and returns how many were evicted."""
+        now = time.monotonic()
+        expired = []
+        if self.max_age is not None:
+            cutoff = now - self.max_age
+            for key in self._data:
+                if self._accessed[key] > cutoff:
+                    break
+                expired.append(key)
+        if self.ttl is not None:
+            cutoff = now - self.ttl
+            expired.extend(key for key, written in self._written.items() if written < cutoff)
+
+        for key in dict.fromkeys(expired):
+            self._evict(key)
+        return len(expired)
+
+    @property
+    def stats(self):
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "loads": self.loads,
+            "memory": sizeof(self._data, depth=3),
+        }
+
+
+class LFUCache(LRUCache):
+    """LRUCache that evicts the least frequently accessed entry first, the least recent one on ties."""
+
+    def __init__(self, maxsize=None, **kwargs):
+        super().__init__(maxsize, **kwargs)
+        self._uses = {}
+        self._buckets = collections.defaultdict(collections.OrderedDict)
+        self._min_uses = 0
+
+    def _touch(self, key):
+        super()._touch(key)
+        uses = self._uses.get(key, 0)
+        if uses:
+            bucket = self._buckets[uses]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[uses]
+                if self._min_uses == uses:
+                    self._min_uses += 1
+        else:
+            self._min_uses = 1
+        self._uses[key] = uses + 1
+        self._buckets[uses + 1][key] = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        uses = self._uses.pop(key)
+        bucket = self._buckets[uses]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[uses]
+
+    def _victim(self):
+        while self._min_uses not in self._buckets:
+            self._min_uses += 1
+        return next(iter(self._buckets[self._min_uses]))
+
+
+POLICIES = {"lru": LRUCache, "lfu": LFUCache}
@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+import itertools
+import pathlib
+import re
+
+import aiosqlite
+
+READ_REGEX = re.compile(r"^\s*(SELECT|EXPLAIN|WITH)\b", flags=re.I)
+WRITE_REGEX = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", flags=re.I)
+
+
+class _Query:
+    """Awaitable returned by `Database.execute`, also usable as `async with` like aiosqlite's."""
+
+    __slots__ = ("_coro", "_cursor")
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._cursor = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._cursor = await self._coro
+        return self._cursor
+
+    async def __aexit__(self, *args):
+        await self._cursor.close()
+
+
+class Database:
+    """SQLite in WAL mode with one serialized writer and a pool of read-only connections.
+
+    Reads (`SELECT`, `EXPLAIN` and read-only `WITH`) are sent to the readers in turn,
+    so they don't queue up behind a long write. Everything else goes through the writer,
+    which runs in autocommit mode, use `transaction` to group writes. Inside a
+    transaction every query of the task holding it goes through the writer, so reads
+    see the uncommitted writes.
+    With `readers=0` every query uses the writer, like a single aiosqlite connection would.
+    """
+
+    def __init__(self, path, *, readers=4):
+        self.path = str(path)
+        self.size = readers
+        self.writer = None
+        self.readers = []
+        self._cycle = None
+        self._lock = None
+        # task running the current transaction
+        self._owner = None
+
+    @classmethod
+    async def connect(cls, path, *, readers=4):
+        self = cls(path, readers=readers)
+        self._lock = asyncio.Lock()
+        self.writer = await aiosqlite.connect(self.path, isolation_level=None)
+        await self.writer.execute("PRAGMA journal_mode = WAL")
+        await self.writer.execute("PRAGMA synchronous = NORMAL")
+
+        uri = f"{pathlib.Path(self.path).resolve().as_uri()}?mode=ro"
+        for _ in range(readers):
+            self.readers.append(await aiosqlite.connect(uri, uri=True, isolation_level=None))
+        self._cycle = itertools.cycle(self.readers)
+        return self
+
+    @staticmethod
+    def is_read(sql: str):
+        if not (match := READ_REGEX.match(sql)):
+            return False
+        return match.group(1).upper() != "WITH" or WRITE_REGEX.search(sql) is None
+
+    async def _write(self, method, sql, parameters):
+        async with self._lock:
+            return await method(sql, parameters)
+
+    def _in_transaction(self):
+        return self._owner is not None and self._owner is asyncio.current_task()
+
+    def execute(self, sql: str, parameters=None):
+        """Runs a query and returns its cursor. Can be awaited or used as an async context manager."""
+        parameters = parameters or ()
+        if self._in_transaction():
+            return _Query(self.writer.execute(sql, parameters))
+        if self.is_read(sql):
+            conn = next(self._cycle) if self.readers else self.writer
+            return _Query(conn.execute(sql, parameters))
+        return _Query(self._write(self.writer.execute, sql, parameters))
+
+    def executemany(self, sql: str, parameters):
+        if self._in_transaction():
+            return _Query(self.writer.executemany(sql, parameters))
+        return _Query(self._write(self.writer.executemany, sql, parameters))
+
+    async def fetchone(self, sql: str, parameters=None):
+        async with self.execute(sql, parameters) as cur:
+            return await cur.fetchone()
+
+    async def fetchall(self, sql: str, parameters=None):
+        async with self.execute(sql, parameters) as cur:
+            return await cur.fetchall()
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Holds the writer for a `BEGIN IMMEDIATE` ... `COMMIT` block and yields its connection.
+
+        Rolls back if the block raises. Other writes wait until the block is done,
+        queries through the Database itself from the same task use the writer too.
+        """
+        async with self._lock:
+            await self.writer.execute("BEGIN IMMEDIATE")
+            self._owner = asyncio.current_task()
+            try:
+                yield self.writer
+            except BaseException:
+                await self.writer.rollback()
+                raise
+            else:
+                await self.writer.commit()
+            finally:
+                self._owner = None
+
+    async def commit(self):
+        async with self._lock:
+            await self.writer.commit()
+
+    async def close(self):
+        for conn in self.readers:
+            await conn.close()
+        await self.writer.close()
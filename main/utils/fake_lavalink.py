@@ -0,0 +1,215 @@
+"""A fake Lavalink server to exercise the NodePool without real nodes.
+
+`FakeLavalink` accepts the wavelink websocket, sends the stats it's told to and
+records every op it receives. Its `/loadtracks` endpoint answers every search with
+one track named after the query. `pool_migrations` runs the node pool against a few of
+them on a bot that never logs in, it's the `nodes` entry of `dev bench` and runs
+standalone with `python -m utils.fake_lavalink` from the main directory.
+"""
+import asyncio
+import collections
+import json
+import time
+import types
+import zlib
+
+import wavelink
+from aiohttp import web
+from discord.ext import commands
+
+from utils.nodes import NodePool, listener
+
+PASSWORD = "fake"
+
+
+def stats_payload(players=0, deficit=0, load=0.05):
+    """A Lavalink stats op, `deficit` counts the frames missing out of the 3000 sent in the last minute."""
+    return {
+        "op": "stats",
+        "players": players,
+        "playingPlayers": players,
+        "uptime": 1,
+        "memory": {"free": 1, "used": 1, "allocated": 1, "reservable": 1},
+        "cpu": {"cores": 4, "systemLoad": load, "lavalinkLoad": load},
+        "frameStats": {"sent": 3000, "nulled": 0, "deficit": deficit},
+    }
+
+
+def track_payload(query):
+    """A Lavalink track named after the query, the same query always gives the same track."""
+    identifier = f"{zlib.crc32(query.encode()):08x}"
+    info = {
+        "identifier": identifier,
+        "isSeekable": True,
+        "author": "Fake",
+        "length": 180_000,
+        "isStream": False,
+        "position": 0,
+        "title": query,
+        "uri": f"https://example.com/{identifier}",
+    }
+    return {"track": f"fake{identifier}", "info": info}
+
+
+class FakeLavalink:
+    """A Lavalink websocket and REST API on localhost, `port` 0 picks a free port."""
+
+    def __init__(self, port=0, *, password=PASSWORD):
+        self.port = port
+        self.password = password
+        self.stats = stats_payload()
+        self.ops = []
+        self.loads = []
+        self.sockets = set()
+        self.runner = None
+
+    async def handler(self, request):
+        if request.headers.get("Authorization") != self.password:
+            raise web.HTTPUnauthorized()
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        try:
+            await ws.send_json(self.stats)
+            async for message in ws:
+                self.ops.append(json.loads(message.data))
+        finally:
+            self.sockets.discard(ws)
+        return ws
+
+    async def load_tracks(self, request):
+        if request.headers.get("Authorization") != self.password:
+            raise web.HTTPUnauthorized()
+
+        query = request.query.get("identifier", "")
+        self.loads.append(query)
+        return web.json_response({"loadType": "SEARCH_RESULT", "playlistInfo": {}, "tracks": [track_payload(query)]})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self.handler)
+        app.router.add_get("/loadtracks", self.load_tracks)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", self.port).start()
+        self.port = self.runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        for ws in list(self.sockets):
+            await ws.close()
+        await self.runner.cleanup()
+
+    async def send_stats(self, **kwargs):
+        """Sends new stats to the connected clients, see `stats_payload` for the arguments."""
+        self.stats = stats_payload(**kwargs)
+        for ws in list(self.sockets):
+            await ws.send_json(self.stats)
+
+    def played(self):
+        """Returns `{guild_id: startTime}` of the play ops received."""
+        return {int(op["guildId"]): op["startTime"] for op in self.ops if op["op"] == "play"}
+
+
+class FakeBot(commands.Bot):
+    """A bot that never logs in, with the attributes NodePool and wavelink read."""
+
+    def __init__(self, nodes):
+        super().__init__(command_prefix="")
+        self.settings = {"config": {"lavalink": {"nodes": nodes}}}
+        self.config = {"password": PASSWORD}
+
+    @property
+    def user(self):
+        return types.SimpleNamespace(id=1)
+
+    def get_guild(self, guild_id):
+        return types.SimpleNamespace(id=guild_id, shard_id=0, region="us_central")
+
+    async def wait_until_ready(self):
+        pass
+
+
+async def pool_migrations(players=20, position=42_000):
+    """Moves players off a degraded node, then off a lost one, then onto a node that came up late.
+
+    After every step a track is loaded through the client, to check which node answers searches.
+    """
+    servers = {identifier: FakeLavalink() for identifier in "AB"}
+    for server in servers.values():
+        await server.start()
+    # C is configured on a port nothing listens on yet, its first connection fails (and wavelink prints the error)
+    servers["C"] = FakeLavalink()
+    probe = await FakeLavalink().start()
+    servers["C"].port = probe.port
+    await probe.stop()
+
+    fake = FakeBot([
+        {"identifier": identifier, "host": "127.0.0.1", "port": server.port}
+        for identifier, server in servers.items()
+    ])
+    client = wavelink.Client(bot=fake)
+    pool = NodePool(fake, client)
+    await pool.connect()
+    await asyncio.sleep(0.1)
+
+    started = time.time() * 1000
+    for guild_id in range(1, players + 1):
+        player = client.get_player(guild_id, node_id="A")
+        player.current = wavelink.Track(f"track{guild_id}", {"title": f"Song {guild_id}", "length": 300_000})
+        player.channel_id = guild_id
+        player.last_position, player.last_update = position, started
+        pool.live.add(guild_id)
+
+    async def step(name, change):
+        for server in servers.values():
+            server.ops.clear()
+            server.loads.clear()
+        await change()
+        await asyncio.sleep(0.1)
+        start = time.perf_counter()
+        moved = await pool.rebalance()
+        elapsed = (time.perf_counter() - start) * 1000
+        await asyncio.sleep(0.05)
+        placement = collections.Counter(player.node.identifier for player in client.players.values())
+        resumed = [start_time for server in servers.values() for start_time in server.played().values()]
+        tracks = await client.get_tracks(f"ytsearch:{name}")
+        loaded_by = [identifier for identifier, server in servers.items() if server.loads]
+        return (
+            name,
+            ", ".join(f"{node.identifier}: {pool.score(node):g}" for node in client.nodes.values()),
+            moved,
+            round(elapsed, 2),
+            ", ".join(f"{identifier}: {count}" for identifier, count in sorted(placement.items())),
+            min(resumed, default=None),
+            f"{', '.join(loaded_by)} ({len(tracks or ())})",
+        )
+
+    rows = []
+    try:
+        rows.append(await step("A degraded", lambda: servers["A"].send_stats(deficit=1500)))
+        rows.append(await step("B lost", servers["B"].stop))
+
+        async def come_up():
+            await servers["C"].start()
+            await pool.reconnect()
+
+        rows.append(await step("C up", come_up))
+    finally:
+        for node in client.nodes.values():
+            if (task := listener(node)) is not None:
+                task.cancel()
+        await client.session.close()
+        for identifier in "AC":
+            await servers[identifier].stop()
+        await fake.close()
+
+    return ("step", "scores", "moved", "rebalance ms", "players", "resumed at ms", "tracks loaded by"), rows
+
+
+if __name__ == "__main__":
+    import tabulate
+
+    headers, rows = asyncio.run(pool_migrations())
+    print(tabulate.tabulate(rows, headers=headers, tablefmt="psql"))
@@ -0,0 +1,152 @@
+import asyncio
+import collections
+import logging
+import time
+
+
+class Flusher:
+    """Write-behind buffer for the currency cache and command counters.
+
+    Cogs only mark what changed, nothing touches the database until `flush`
+    writes the dirty rows with one `executemany` per table in a single transaction.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.dirty_users = set()
+        self.evicted = {}
+        self._in_flight = {}
+        self._flushing = set()
+        self._lock = asyncio.Lock()
+        self.commands_ran = collections.Counter()
+        self.usage = collections.Counter()
+        self.stats = {
+            "flushes": 0,
+            "failures": 0,
+            "rows": 0,
+            "last_rows": 0,
+            "last_duration": 0.0,
+            "max_duration": 0.0,
+        }
+
+    def __len__(self):
+        return len(self.dirty_users) + len(self.commands_ran) + len(self.usage)
+
+    def mark_user(self, user_id):
+        """Marks a cached currency account as changed."""
+        self.dirty_users.add(user_id)
+
+    def evict(self, user_id, data):
+        """Keeps a dirty or flushing account evicted from the cache until it is flushed."""
+        if user_id in self.dirty_users or user_id in self._flushing:
+            self.evicted[user_id] = data
+
+    def forget_user(self, user_id):
+        """Drops the unflushed account of a deleted user, so it can't be restored or written back."""
+        self.dirty_users.discard(user_id)
+        self.evicted.pop(user_id, None)
+        self._in_flight.pop(user_id, None)
+        self._flushing.discard(user_id)
+
+    def restore(self, user_id):
+        """Returns the unflushed data of an evicted account, if any."""
+        if (data := self.evicted.pop(user_id, None)) is not None:
+            return data
+        return self._in_flight.get(user_id)
+
+    def count_command(self, user_id, command):
+        """Counts a command invocation for users_data and usage."""
+        self.commands_ran[user_id] += 1
+        self.usage[command] += 1
+
+    def _snapshot(self):
+        users, self.dirty_users = self.dirty_users, set()
+        evicted, self.evicted = self.evicted, {}
+        commands_ran, self.commands_ran = self.commands_ran, collections.Counter()
+        usage, self.usage = self.usage, collections.Counter()
+
+        cache = self.bot.cache["users"]
+        accounts = [
+            (
+                data["wallet"],
+                data["bank"],
+                data["max_bank"],
+                round(data["boost"], 2),
+                data["exp"],
+                data["lvl"],
+                data.get("prestige", 0),
+                user_id,
+            )
+            for user_id in users
+            if (data := cache.peek(user_id, evicted.get(user_id))) is not None
+        ]
+        return users, evicted, commands_ran, usage, accounts
+
+    def _restore(self, users, evicted, commands_ran, usage):
+        """Puts a failed snapshot back so the next flush retries it."""
+        self.dirty_users |= users
+        cache = self.bot.cache["users"]
+        self.evicted = {**{k: v for k, v in evicted.items() if k not in cache}, **self.evicted}
+        self.commands_ran.update(commands_ran)
+        self.usage.update(usage)
+
+    async def flush(self):
+        """Writes everything marked since the last flush and returns the amount of rows written.
+
+        Flushes don't overlap, a flush started while another one is running waits for it.
+        """
+        async with self._lock:
+            return await self._flush()
+
+    async def _flush(self):
+        if not len(self):
+            return 0
+
+        users, evicted, commands_ran, usage, accounts = self._snapshot()
+        self._in_flight = evicted
+        self._flushing = users
+        start = time.perf_counter()
+        try:
+            async with self.bot.db.transaction() as db:
+                await db.executemany(
+                    """
+                    INSERT INTO users_data (user_id, commands_ran)
+                    VALUES (?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET commands_ran = commands_ran + excluded.commands_ran
+                    """,
+                    commands_ran.items(),
+                )
+                await db.executemany(
+                    """
+                    INSERT INTO usage (command, counter)
+                    VALUES (?, ?)
+                    ON CONFLICT(command) DO UPDATE SET counter = counter + excluded.counter
+                    """,
+                    usage.items(),
+                )
+                await db.executemany(
+                    "UPDATE currency_data SET wallet = ?, bank = ?, max_bank = ?, boost = ?, exp = ?, lvl = ?, prestige = ? WHERE user_id = ?",
+                    accounts,
+                )
+        except Exception:
+            self._restore(users, evicted, commands_ran, usage)
+            self.stats["failures"] += 1
+            raise
+        finally:
+            self._in_flight = {}
+            self._flushing = set()
+        self._lock = asyncio.Lock()
+
+        # accounts evicted while flushing were written, unless they changed again
+        for user_id in users - self.dirty_users:
+            self.evicted.pop(user_id, None)
+
+        duration = time.perf_counter() - start
+        rows = len(commands_ran) + len(usage) + len(accounts)
+        self.stats["flushes"] += 1
+        self.stats["rows"] += rows
+        self.stats["last_rows"] = rows
+        self.stats["last_duration"] = duration
+        self.stats["max_duration"] = max(self.stats["max_duration"], duration)
+        logging.info(f"Flushed {rows} rows ({len(accounts)} accounts) in {duration * 1000:.1f} ms")
+        return rows
@@ -0,0 +1,81 @@
+import collections.abc
+import heapq
+import re
+
+
+class FuzzyIndex:
+    """Fuzzy search over a set of names, built once and updated with `add` and `remove`.
+
+    A name matches if it contains the characters of the query in order. Matches are
+    ranked like `utils.useful.fuzzy.finder`: shortest matching span, then earliest
+    start, then name. Every character has the set of names containing it, so only
+    names that contain all the characters of the query are matched against the regex.
+
+    The prefilter uses characters rather than trigrams or bigrams on purpose: those
+    only match contiguous text, so "msg" would no longer find "message". Postings of
+    ordered character pairs would keep the matches, but cost hundreds of entries per
+    name. On 100k rtfm-like names (`dev bench fuzzy`), 28 to 87% of the candidates of
+    most queries are real matches, so the regex work left is mostly ranking them.
+    """
+
+    def __init__(self, entries=()):
+        self._values = {}
+        self._lower = {}
+        self._chars = collections.defaultdict(set)
+        self.update(entries)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def update(self, entries):
+        """Adds every `(name, value)` pair or, for a mapping, every item."""
+        if isinstance(entries, collections.abc.Mapping):
+            entries = entries.items()
+        for name, value in entries:
+            self.add(name, value)
+
+    def add(self, name, value=None):
+        if name in self._values:
+            self.remove(name)
+        lower = name.lower()
+        self._values[name] = value
+        self._lower[name] = lower
+        for char in set(lower):
+            self._chars[char].add(name)
+
+    def remove(self, name):
+        if name not in self._values:
+            return
+        del self._values[name]
+        for char in set(self._lower.pop(name)):
+            names = self._chars[char]
+            names.discard(name)
+            if not names:
+                del self._chars[char]
+
+    def search(self, query: str, limit=8):
+        """Returns the best `(name, value)` matches, all of them sorted if limit is None."""
+        query = query.lower()
+        if not query:
+            return []
+
+        postings = []
+        for char in set(query):
+            if (names := self._chars.get(char)) is None:
+                return []
+            postings.append(names)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+
+        regex = re.compile(".*?".join(map(re.escape, query)))
+        lower = self._lower
+        scored = (
+            (len(match.group()), match.start(), name)
+            for name in candidates
+            if (match := regex.search(lower[name]))
+        )
+        best = sorted(scored) if limit is None else heapq.nsmallest(limit, scored)
+        return [(name, self._values[name]) for _, _, name in best]
@@ -0,0 +1,117 @@
+import collections
+
+from utils.fuzzy import FuzzyIndex
+
+Item = collections.namedtuple("Item", "id price name description brief")
+
+
+class InventoryCache:
+    """Inventories cached per user in the "inventories" cache namespace, written through on changes.
+
+    `items` maps item ids to the rows of item_info and `names` maps the
+    lowercased item names to their id, both are loaded once by `load_items`.
+    Since every change is written to the database first, evicting an
+    inventory only means it is read again on the next access.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.items = {}
+        self.names = {}
+        self.index = FuzzyIndex()
+
+    @property
+    def users(self):
+        return self.bot.cache["inventories"]
+
+    async def load_items(self):
+        query = "SELECT item_id, item_price, item_name, item_description, item_brief FROM item_info ORDER BY item_id"
+        cur = await self.bot.db.execute(query)
+        rows = await cur.fetchall()
+        self.items = {row[0]: Item(*row) for row in rows}
+        self.names = {item.name.lower(): item.id for item in self.items.values()}
+        self.index = FuzzyIndex((item.name, item) for item in self.items.values())
+
+    def get_item(self, name: str):
+        """Gets an item by its exact name, case insensitive."""
+        item_id = self.names.get(name.lower())
+        return self.items.get(item_id)
+
+    def find_item(self, name: str, item_ids=None):
+        """Gets the item that best fuzzily matches `name`, optionally only looking at `item_ids`."""
+        for _, item in self.index.search(name, limit=None if item_ids is not None else 1):
+            if item_ids is None or item.id in item_ids:
+                return item
+        return None
+
+    def match_item(self, name: str, item_ids=None):
+        """Gets the item named `name`, or else the only one whose name contains it, case insensitive.
+
+        Used by the commands that move coins, where a fuzzy match could pick another item than meant.
+        """
+        name = name.lower()
+        if (item_id := self.names.get(name)) is not None and (item_ids is None or item_id in item_ids):
+            return self.items[item_id]
+        matches = [
+            item for item in self.items.values()
+            if name in item.name.lower() and (item_ids is None or item.id in item_ids)
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+    def suggest(self, name: str, item_ids=None, limit=3):
+        """Returns the names of the items that fuzzily match `name`, for "did you mean" hints."""
+        return [
+            item.name for _, item in self.index.search(name, limit=None)
+            if item_ids is None or item.id in item_ids
+        ][:limit]
+
+    async def delete_item(self, item):
+        """Deletes an item from the shop and from every inventory."""
+        async with self.bot.db.transaction() as db:
+            await db.execute("DELETE FROM item_info WHERE item_id = ?", (item.id,))
+            await db.execute("DELETE FROM user_Inventory WHERE item_id = ?", (item.id,))
+        await self.load_items()
+        for user_id in list(self.users):
+            self.users.peek(user_id, {}).pop(item.id, None)
+
+    async def get(self, user_id):
+        """Returns the `{item_id: amount}` mapping of a user."""
+        return await self.users.load(user_id)
+
+    async def fetch(self, user_id):
+        """Loader of the "inventories" namespace, items that aren't in the shop anymore are left out."""
+        query = "SELECT item_id, amount FROM user_Inventory WHERE user_id = ?"
+        cur = await self.bot.db.execute(query, (user_id,))
+        rows = await cur.fetchall()
+        return {item_id: amount for item_id, amount in rows if amount > 0 and item_id in self.items}
+
+    async def amount(self, user_id, item_id):
+        return (await self.get(user_id)).get(item_id, 0)
+
+    async def add(self, user_id, item_id, amount: int):
+        query = """
+                INSERT INTO user_Inventory
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, item_id) DO UPDATE SET amount = amount + excluded.amount
+                """
+        await self.bot.db.execute(query, (user_id, item_id, amount))
+        # only the cached inventory is updated, an evicted one is read again with the change
+        if (inventory := self.users.get(user_id)) is not None:
+            inventory[item_id] = inventory.get(item_id, 0) + amount
+
+    async def remove(self, user_id, item_id, amount: int):
+        query = """
+                UPDATE user_Inventory
+                SET amount = amount - ?
+                WHERE user_id = ? AND item_id = ?
+                """
+        await self.bot.db.execute(query, (amount, user_id, item_id))
+        if (inventory := self.users.get(user_id)) is None:
+            return
+        if (left := inventory.get(item_id, 0) - amount) > 0:
+            inventory[item_id] = left
+        else:
+            inventory.pop(item_id, None)
+
+    def forget(self, user_id):
+        self.users.pop(user_id, None)
@@ -1,4 +1,11 @@
+import asyncio
+import collections
+import contextlib
+import copy
 import json
+import logging
+import os
+import tempfile
 from pathlib import Path
 
 
@@ -37,3 +44,100 @@ def write_json(data, filename):
     cwd = get_path()
     with open(cwd + "/bot_config/" + filename + ".json", "w") as file:
         json.dump(data, file, indent=4)
+
+
+
+class Settings:
+    """
+    Cached access to the json files in bot_config.
+    A file is parsed once and only read again when its mtime or size changes.
+    Writes are atomic and run in an executor, listeners are called with the
+    new data whenever a file changes.
+    Reloading a changed file is synchronous on purpose: `get` is called from
+    sync code (help, the node pool) and the files are a few KiB that only
+    change through `edit` or by hand, so the read is as cheap as the stat.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or get_path() + "/bot_config")
+        self._files = {}
+        self._locks = collections.defaultdict(asyncio.Lock)
+        self._listeners = collections.defaultdict(list)
+
+    def _path(self, filename):
+        return self.directory / f"{filename}.json"
+
+    def get(self, filename):
+        """
+        Returns the data of a file, reloading it if it changed on disk.
+        The returned dict is shared, use `edit` to change it.
+        """
+        stat = self._path(filename).stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._files.get(filename)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with open(self._path(filename), "r") as file:
+            data = json.load(file)
+        self._files[filename] = (key, data)
+        if cached is not None:
+            self._notify(filename, data)
+        return data
+
+    async def write(self, filename, data):
+        """Atomically replaces a file with `data`."""
+        async with self._locks[filename]:
+            await self._write(filename, data)
+        self._notify(filename, data)
+
+    async def _write(self, filename, data):
+        text = json.dumps(data, indent=4)
+        key = await asyncio.get_running_loop().run_in_executor(None, self._write_file, self._path(filename), text)
+        self._files[filename] = (key, data)
+
+    @staticmethod
+    def _write_file(path, text):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+            raise
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    @contextlib.asynccontextmanager
+    async def edit(self, filename):
+        """
+        Yields a copy of the data of a file and writes it back when the block exits.
+        The file is locked for the whole block, so concurrent edits don't overwrite each other.
+        Usage:
+         - async with bot.settings.edit("config") as data:
+               data["status"]["groot"] = "online"
+        """
+        async with self._locks[filename]:
+            data = copy.deepcopy(self.get(filename))
+            yield data
+            await self._write(filename, data)
+        self._notify(filename, data)
+
+    def listen(self, filename, callback):
+        """Calls `callback(data)` every time the file changes."""
+        self._listeners[filename].append(callback)
+
+    def remove_listener(self, filename, callback):
+        with contextlib.suppress(ValueError):
+            self._listeners[filename].remove(callback)
+
+    def _notify(self, filename, data):
+        for callback in self._listeners[filename]:
+            try:
+                callback(data)
+            except Exception:
+                logging.exception(f"Ignoring exception in {filename} settings listener")
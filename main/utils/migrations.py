@@ -0,0 +1,144 @@
+import logging
+import pathlib
+import re
+import sqlite3
+
+MIGRATION_REGEX = re.compile(r"^(\d+)_(\w+)\.sql$")
+SCAN_REGEX = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)")
+
+# Queries that run on every invocation of a command or event.
+# `check_query_plans` makes sure none of them does a full table scan.
+HOT_QUERIES = {
+    "account": "SELECT * FROM currency_data WHERE user_id = ?",
+    "commands_ran": "SELECT commands_ran FROM users_data WHERE user_id = ?",
+    "inventory": "SELECT item_id, amount FROM user_Inventory WHERE user_id = ?",
+    "tag": "SELECT tag_content FROM tags WHERE tag_guild_id = ? AND tag_name = ?",
+    "tag_names": "SELECT tag_name FROM tags WHERE tag_guild_id = ?",
+    "playlists": """
+        SELECT playlist_name, playlist_id,
+        (
+            SELECT Count(*)
+            FROM playlist_songs
+            WHERE playlist_songs.playlist_id = playlists.playlist_id
+        )
+        FROM playlists
+        WHERE user_id = ?
+        """,
+    "playlist_owner": "SELECT user_id FROM playlists WHERE playlist_id = ?",
+    "playlist_songs": """
+        SELECT playlist_song, playlist_url, song_id,
+            track_id, track_identifier, track_length, track_author,
+            (
+                SELECT playlist_name
+                FROM playlists
+                WHERE playlists.playlist_id = ?
+            )
+        FROM playlist_songs
+        WHERE playlist_id = (
+            SELECT playlist_id FROM playlists
+            WHERE playlist_id = ?
+        )
+        """,
+    "remove_song": "DELETE FROM playlist_songs WHERE song_id = ?",
+    "user_songs": """
+        SELECT Count(*) FROM playlist_songs
+        WHERE playlist_id IN (SELECT playlist_id FROM playlists WHERE user_id = ?)
+        """,
+    "frozen_names": "SELECT * FROM frozen_names WHERE guild_id = ? AND user_id = ?",
+}
+
+
+def get_migrations(directory):
+    """Returns the `(version, path)` of every migration file in the directory, in order."""
+    migrations = []
+    for path in pathlib.Path(directory).iterdir():
+        if match := MIGRATION_REGEX.match(path.name):
+            migrations.append((int(match.group(1)), path))
+    return sorted(migrations)
+
+
+def split_statements(script: str):
+    """Splits a SQL script into statements, keeping trigger bodies in one piece."""
+    statements = []
+    current = ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if statement := current.strip():
+                statements.append(statement)
+            current = ""
+    if current.strip() and not all(l.strip().startswith("--") for l in current.splitlines() if l.strip()):
+        raise RuntimeError(f"Unterminated statement in migration: {current.strip()[:50]}")
+    return statements
+
+
+async def migrate(db, directory):
+    """Applies every migration newer than the database's `user_version`.
+
+    Each migration runs in its own transaction together with the version bump,
+    so a failing migration leaves the database at the previous version.
+    """
+    row = await db.fetchone("PRAGMA user_version")
+    version = row[0]
+    applied = 0
+
+    for number, path in get_migrations(directory):
+        if number <= version:
+            continue
+
+        async with db.transaction() as conn:
+            for statement in split_statements(path.read_text()):
+                await conn.execute(statement)
+            await conn.execute(f"PRAGMA user_version = {number}")
+        logging.warning(f"Applied migration {path.name}")
+        version = number
+        applied += 1
+
+    await db.execute("ANALYZE" if applied else "PRAGMA optimize")
+    return version
+
+
+def explain(conn, query: str):
+    """Returns the `EXPLAIN QUERY PLAN` details of a query."""
+    params = (None,) * query.count("?")
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+async def schema_copy(db):
+    """Returns an in-memory sqlite3 connection with the schema of the database, but no rows or statistics."""
+    rows = await db.fetchall(
+        """
+        SELECT sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+        ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END
+        """
+    )
+    conn = sqlite3.connect(":memory:")
+    for (sql,) in rows:
+        conn.execute(sql)
+    return conn
+
+
+async def check_query_plans(db, queries=None):
+    """Raises RuntimeError if any of the queries does a full table scan.
+
+    The plans come from a copy of the schema without statistics: after `ANALYZE`
+    SQLite rightly scans tables that are still small, which isn't a missing index.
+    Returns the query plans as `(name, detail)` otherwise.
+    """
+    plans = []
+    scans = []
+    conn = await schema_copy(db)
+    try:
+        for name, query in (queries or HOT_QUERIES).items():
+            for detail in explain(conn, query):
+                plans.append((name, detail))
+                if SCAN_REGEX.match(detail):
+                    scans.append(f"{name}: {detail}")
+    finally:
+        conn.close()
+
+    if scans:
+        raise RuntimeError("Full table scan in hot queries:\n" + "\n".join(scans))
+    return plans
@@ -0,0 +1,130 @@
+import collections
+import logging
+import math
+
+DEFAULT_NODES = [{"identifier": "Node 1", "host": "127.0.0.1", "port": 2333, "region": "us_central"}]
+# penalty above which a node is degraded, a node with ~10 playing players and no load has a penalty of ~10
+DEGRADED_PENALTY = 500
+# players moved off a degraded node by one rebalance, the node stats only refresh every minute
+MAX_MIGRATIONS = 25
+
+
+def listener(node):
+    """Returns the task reading the websocket of a node, None until a connection succeeded.
+
+    wavelink 0.9.x keeps it in the private `WebSocket._task`: it's created by the first
+    successful connection and the lost connections are retried from inside it, so a
+    node without one is never connected again by wavelink.
+    """
+    return node._websocket._task
+
+
+class NodePool:
+    """The Lavalink nodes of the bot, configured in the "lavalink" section of config.json.
+
+    Every node is a dict with an identifier, host and port and optionally a rest_uri,
+    region, password and secure flag. Without that section the local node is used.
+    The password defaults to the `password` environment variable.
+
+    Nodes are scored with the Lavalink penalty (playing players, CPU load and nulled or
+    missing frames). New players go to the best node and `rebalance` moves the players
+    of disconnected or degraded nodes, keeping their position.
+
+    `live` holds the guilds that have a player, so events can skip the other guilds
+    without looking through the nodes. Players remove themselves when destroyed.
+    """
+
+    def __init__(self, bot, client):
+        self.bot = bot
+        self.client = client
+        self.stats = collections.Counter()
+        self.live = set()
+
+    def configured(self):
+        """Returns the node dicts of the config, with their defaults filled in."""
+        config = self.bot.settings.get("config").get("lavalink", {})
+        nodes = []
+        for node in config.get("nodes") or DEFAULT_NODES:
+            node = {"region": "us_central", "secure": False, "password": self.bot.config.get("password"), **node}
+            node.setdefault("rest_uri", f"{'https' if node['secure'] else 'http'}://{node['host']}:{node['port']}")
+            nodes.append(node)
+        return nodes
+
+    async def connect(self):
+        """Connects the configured nodes that aren't connected yet."""
+        for node in self.configured():
+            if node["identifier"] in self.client.nodes:
+                continue
+            try:
+                await self.client.initiate_node(**node)
+            except Exception as error:
+                logging.warning(f"Connecting Lavalink node {node['identifier']} failed: {error!r}")
+
+    async def reconnect(self):
+        """Connects again the nodes whose first connection failed, wavelink only retries lost connections."""
+        for node in self.client.nodes.values():
+            if not node.is_available and listener(node) is None:
+                await node.connect(self.bot)
+
+    @staticmethod
+    def score(node):
+        """Lower is better, unavailable nodes score infinity."""
+        if not node.is_available:
+            return math.inf
+        return node.stats.penalty.total if node.stats else len(node.players)
+
+    def best(self, exclude=None, extra=None):
+        """Returns the available node with the lowest score, `extra` maps nodes to a score to add."""
+        scores = {
+            node: self.score(node) + (extra or {}).get(node, 0)
+            for node in self.client.nodes.values()
+            if node is not exclude and node.is_available
+        }
+        return min(scores, key=scores.get, default=None)
+
+    def find(self, guild_id):
+        """Returns the player of a guild without creating one, None if there is none."""
+        if guild_id not in self.live:
+            return None
+        for node in self.client.nodes.values():
+            if (player := node.players.get(guild_id)) is not None:
+                return player
+        self.live.discard(guild_id)
+        return None
+
+    def get_player(self, guild_id, **kwargs):
+        """Returns the player of a guild, creating it on the best node."""
+        if (player := self.find(guild_id)) is not None:
+            return player
+        node = self.best()
+        player = self.client.get_player(guild_id, node_id=node and node.identifier, **kwargs)
+        self.live.add(guild_id)
+        return player
+
+    def degraded(self, node):
+        return not node.is_available or self.score(node) > DEGRADED_PENALTY
+
+    async def rebalance(self):
+        """Moves the players of disconnected or degraded nodes to better ones and returns how many moved."""
+        moved = collections.Counter()
+        for node in list(self.client.nodes.values()):
+            if not node.players or not self.degraded(node):
+                continue
+            for player in list(node.players.values())[:MAX_MIGRATIONS]:
+                # every moved player counts as one more playing player until the stats refresh
+                target = self.best(exclude=node, extra=moved)
+                if target is None or self.score(target) + moved[target] >= self.score(node):
+                    break
+                if await self.migrate(player, target):
+                    moved[target] += 1
+        return sum(moved.values())
+
+    async def migrate(self, player, node):
+        try:
+            await player.change_node(node.identifier)
+        except Exception as error:
+            self.stats["failed"] += 1
+            logging.warning(f"Moving the player of {player.guild_id} to {node.identifier} failed: {error!r}")
+            return False
+        self.stats["migrated"] += 1
+        return True
@@ -1,5 +1,5 @@
 from discord.ext import menus
-from utils.useful import Embed
+from utils.useful import Embed, convert
 
 class PlaylistSource(menus.ListPageSource):
     def __init__(self, data, playlist):
@@ -14,15 +14,22 @@ class PlaylistSource(menus.ListPageSource):
         return em
 
 class QueueSource(menus.ListPageSource):
-    def __init__(self, data, player):
-        super().__init__(data, per_page=10)
+    """Pages through a player's queue, only the tracks of the page shown are formatted."""
+
+    def __init__(self, player):
+        super().__init__(player.queue, per_page=10)
         self.player = player
 
     async def format_page(self, menu, entries):
+        start = menu.current_page * self.per_page + 2
+        lines = [
+            f"**{i}**. [{track.title}]({track.uri}) | `{convert(int(track.length))}`"
+            for i, track in enumerate(entries, start=start)
+        ]
         em = Embed(
             description=f"**Currently playing:**\n **1.** [{self.player.current.title}]({self.player.current.uri})\nRequested by {self.player.current.requester.mention}\n\n"+
-                        f"**Next up [{self.player.queue.qsize()}]: **\n" + 
-                         "\n".join(entries)
+                        f"**Next up [{len(self.player.queue)}]: **\n" + 
+                         "\n".join(lines)
         )
         em.set_footer(text=f"Page {menu.current_page + 1} of {self.get_max_pages()} | Looping track: {'❌' if not self.player.looping else '✅' }")
         return em
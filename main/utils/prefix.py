@@ -0,0 +1,70 @@
+import re
+
+DEFAULT_PREFIXES = ("g.",)
+MAX_PREFIXES = 10
+
+
+class Prefixes:
+    """The prefixes of one guild with their precompiled, case insensitive matcher."""
+
+    __slots__ = ("prefixes", "pattern")
+
+    def __init__(self, prefixes):
+        self.prefixes = tuple(prefixes)
+        # longest first so "g.." wins over "g." when both are set
+        escaped = (re.escape(p) for p in sorted(self.prefixes, key=len, reverse=True))
+        self.pattern = re.compile("|".join(escaped), flags=re.I)
+
+    def match(self, content: str):
+        """Returns the prefix as written in the message, or None if the message doesn't start with one."""
+        if match := self.pattern.match(content):
+            return match.group()
+        return None
+
+    @property
+    def first(self):
+        return self.prefixes[0]
+
+
+class PrefixResolver:
+    """Prefixes of every guild, loaded once by `load` and kept in sync by `set`.
+
+    Guilds without custom prefixes share the default entry, so a lookup never
+    needs to hit the database.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.default = Prefixes(DEFAULT_PREFIXES)
+        self.guilds = {}
+
+    async def load(self):
+        query = "SELECT guild_id, prefix FROM guild_prefixes ORDER BY guild_id, position"
+        rows = await self.bot.db.fetchall(query)
+        prefixes = {}
+        for guild_id, prefix in rows:
+            prefixes.setdefault(guild_id, []).append(prefix)
+        self.guilds = {guild_id: Prefixes(p) for guild_id, p in prefixes.items()}
+
+    def get(self, snowflake_id):
+        return self.guilds.get(snowflake_id, self.default)
+
+    def match(self, snowflake_id, content: str):
+        return self.get(snowflake_id).match(content)
+
+    async def set(self, guild_id, prefixes):
+        """Replaces the prefixes of a guild, an empty list goes back to the default."""
+        prefixes = list(dict.fromkeys(prefixes))
+        if tuple(prefixes) == DEFAULT_PREFIXES:
+            prefixes = []
+        async with self.bot.db.transaction() as db:
+            await db.execute("DELETE FROM guild_prefixes WHERE guild_id = ?", (guild_id,))
+            await db.executemany(
+                "INSERT INTO guild_prefixes (guild_id, prefix, position) VALUES (?, ?, ?)",
+                ((guild_id, prefix, position) for position, prefix in enumerate(prefixes)),
+            )
+
+        if prefixes:
+            self.guilds[guild_id] = Prefixes(prefixes)
+        else:
+            self.guilds.pop(guild_id, None)
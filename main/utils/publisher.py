@@ -0,0 +1,58 @@
+import collections
+import hashlib
+import json
+import logging
+import time
+
+
+def digest(payload):
+    """Stable hash of anything json serializable."""
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Publisher:
+    """Only sends an update when what it would send changed, backing off after failures.
+
+    `stats` counts the issued, skipped (unchanged), failed and backed off updates.
+    """
+
+    def __init__(self, name, *, backoff=10, max_backoff=600):
+        self.name = name
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = collections.Counter()
+        self.failures = 0
+        self._last = None
+        self._retry_at = 0
+
+    def reset(self):
+        """Forgets the last payload and any backoff so the next publish is always sent."""
+        self._last = None
+        self.failures = 0
+        self._retry_at = 0
+
+    async def publish(self, payload, send):
+        """Awaits `send()` if `payload` differs from the last one sent and returns whether it did."""
+        if time.monotonic() < self._retry_at:
+            self.stats["backed_off"] += 1
+            return False
+
+        key = digest(payload)
+        if key == self._last:
+            self.stats["skipped"] += 1
+            return False
+
+        try:
+            await send()
+        except Exception as error:
+            self.failures += 1
+            self.stats["failed"] += 1
+            delay = min(self.backoff * 2 ** (self.failures - 1), self.max_backoff)
+            self._retry_at = time.monotonic() + delay
+            logging.warning(f"Publishing {self.name} failed ({error!r}), retrying in {delay}s")
+            return False
+
+        self._last = key
+        self.failures = 0
+        self.stats["issued"] += 1
+        return True
@@ -0,0 +1,72 @@
+import collections
+import time
+
+Snipe = collections.namedtuple("Snipe", "author_id content before created_at jump_url sniped_at")
+
+
+class SnipeStore:
+    """Recently deleted or edited messages, newest first, per channel.
+
+    Every channel keeps at most `per_channel` records and the whole store at
+    most `max_total`, the oldest records are dropped first. Records older
+    than `max_age` seconds are removed by `expire`, which is meant to be
+    called periodically.
+    """
+
+    def __init__(self, per_channel=20, max_total=5000, max_age=300):
+        self.per_channel = per_channel
+        self.max_total = max_total
+        self.max_age = max_age
+        self.channels = {}
+        self.size = 0
+        # every record in the order it was added, to expire and cap without scanning the channels
+        self._order = collections.deque()
+
+    def __len__(self):
+        return self.size
+
+    def add(self, channel_id, message, before=None):
+        """Stores a message, `before` is the content before an edit."""
+        record = Snipe(
+            message.author.id,
+            message.content,
+            before,
+            message.edited_at or message.created_at,
+            message.jump_url,
+            time.monotonic(),
+        )
+        if (channel := self.channels.get(channel_id)) is None:
+            channel = self.channels[channel_id] = collections.deque(maxlen=self.per_channel)
+        if len(channel) < self.per_channel:
+            self.size += 1
+        # a full channel silently drops its oldest record, `_pop_oldest` skips it and `_compact` forgets it
+        channel.appendleft(record)
+        self._order.append((channel_id, record))
+
+        while self.size > self.max_total:
+            self._pop_oldest()
+        if len(self._order) > 2 * self.max_total:
+            self._compact()
+
+    def get(self, channel_id):
+        return self.channels.get(channel_id, ())
+
+    def _pop_oldest(self):
+        channel_id, record = self._order.popleft()
+        channel = self.channels.get(channel_id)
+        if channel and channel[-1] is record:
+            channel.pop()
+            self.size -= 1
+            if not channel:
+                del self.channels[channel_id]
+
+    def _compact(self):
+        """Forgets the records the channels dropped, so they don't pile up in `_order` until they expire."""
+        kept = {id(record) for channel in self.channels.values() for record in channel}
+        self._order = collections.deque(entry for entry in self._order if id(entry[1]) in kept)
+
+    def expire(self):
+        """Removes the records older than `max_age`."""
+        cutoff = time.monotonic() - self.max_age
+        while self._order and self._order[0][1].sniped_at < cutoff:
+            self._pop_oldest()
@@ -0,0 +1,142 @@
+import codecs
+import io
+import re
+import zlib
+
+# This regex mostly comes from the Sphinx repository.
+ENTRY_REGEX = re.compile(r'(?x)(.+?)\s+(\S*:\S*)\s+(-?\d+)\s+(\S+)\s+(.*)')
+
+
+# Danny's code.
+class SphinxObjectFileReader:
+    # Inspired by Sphinx's InventoryFileReader
+    BUFSIZE = 16 * 1024
+
+    def __init__(self, buffer):
+        self.stream = io.BytesIO(buffer)
+
+    def readline(self):
+        return self.stream.readline().decode('utf-8')
+
+    def skipline(self):
+        self.stream.readline()
+
+    def read_compressed_chunks(self):
+        while True:
+            chunk = self.stream.read(self.BUFSIZE)
+            if len(chunk) == 0:
+                break
+            yield chunk
+
+    def read_compressed_lines(self):
+        decoder = LineDecoder()
+        for chunk in self.read_compressed_chunks():
+            yield from decoder.feed(chunk)
+        yield from decoder.flush()
+
+
+class LineDecoder:
+    """Decompresses and decodes the zlib part of an inventory chunk by chunk.
+
+    Only the unfinished last line of a chunk is carried over to the next one,
+    so every byte is copied a constant number of times.
+    """
+
+    def __init__(self):
+        self._zlib = zlib.decompressobj()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._carry = ''
+
+    def feed(self, chunk):
+        lines = (self._carry + self._utf8.decode(self._zlib.decompress(chunk))).split('\n')
+        self._carry = lines.pop()
+        return lines
+
+    def flush(self):
+        rest = self._carry + self._utf8.decode(self._zlib.flush(), final=True)
+        self._carry = ''
+        return rest.split('\n') if rest else []
+
+
+class InventoryParser:
+    """Builds the `{name: url}` lookup table of a Sphinx inventory.
+
+    n.b.: for discord.py, names don't have the `discord` or `discord.ext.commands` namespaces
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.project = None
+        self.result = {}
+
+    def parse_header(self, lines):
+        """Checks the four plain text lines an inventory starts with."""
+        # first line is version info
+        if lines[0].rstrip() != '# Sphinx inventory version 2':
+            raise RuntimeError('Invalid objects.inv file version.')
+
+        # next line is "# Project: <name>"
+        # then after that is "# Version: <version>"
+        self.project = lines[1].rstrip()[11:]
+
+        # next line says if it's a zlib header
+        if 'zlib' not in lines[3]:
+            raise RuntimeError('Invalid objects.inv file, not z-lib compatible.')
+
+    def feed(self, lines):
+        result = self.result
+        url = self.url
+        strip_discord = self.project == 'discord.py'
+        for line in lines:
+            # most lines have no spaces in their name, splitting is a lot faster than the regex
+            parts = line.rstrip().split(' ', 4)
+            if len(parts) == 5 and ':' in parts[1] and parts[2].lstrip('-').isdigit():
+                name, directive, _, location, dispname = parts
+            elif match := ENTRY_REGEX.match(line.rstrip()):
+                name, directive, _, location, dispname = match.groups()
+            else:
+                continue
+
+            domain, _, subdirective = directive.partition(':')
+            if directive == 'py:module' and name in result:
+                # From the Sphinx Repository:
+                # due to a bug in 1.1 and below,
+                # two inventory entries are created
+                # for Python modules, and the first
+                # one is correct
+                continue
+
+            # Most documentation pages have a label
+            if directive == 'std:doc':
+                subdirective = 'label'
+
+            if location.endswith('$'):
+                location = location[:-1] + name
+
+            key = name if dispname == '-' else dispname
+            prefix = f'{subdirective}:' if domain == 'std' else ''
+
+            if strip_discord:
+                key = key.replace('discord.ext.commands.', '').replace('discord.', '')
+
+            result[f'{prefix}{key}'] = f'{url}/{location}'
+
+
+def parse_inventory(buffer, url):
+    """Parses an objects.inv file that's already in memory."""
+    stream = SphinxObjectFileReader(buffer)
+    parser = InventoryParser(url)
+    parser.parse_header([stream.readline() for _ in range(4)])
+    parser.feed(stream.read_compressed_lines())
+    return parser.result
+
+
+async def parse_inventory_stream(content, url):
+    """Parses an objects.inv file while it's downloaded, `content` is an aiohttp StreamReader."""
+    parser = InventoryParser(url)
+    parser.parse_header([(await content.readline()).decode('utf-8') for _ in range(4)])
+    decoder = LineDecoder()
+    async for chunk in content.iter_chunked(SphinxObjectFileReader.BUFSIZE):
+        parser.feed(decoder.feed(chunk))
+    parser.feed(decoder.flush())
+    return parser.result
@@ -9,6 +9,23 @@ from discord.ext import commands
 class customContext(commands.Context):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.typed = False
+        self._typing_task = None
+
+    def defer_typing(self, delay: float):
+        """Starts typing only if nothing was sent after `delay` seconds, until `cancel_typing` is called."""
+        async def typing():
+            await asyncio.sleep(delay)
+            self.typed = True
+            async with self.typing():
+                await asyncio.Future()
+
+        self._typing_task = self.bot.loop.create_task(typing())
+
+    def cancel_typing(self):
+        if self._typing_task is not None:
+            self._typing_task.cancel()
+            self._typing_task = None
 
     class processing:
 
@@ -33,6 +50,7 @@ class customContext(commands.Context):
             self.task.__exit__(None, None, None)
 
     async def send(self, content=None, **kwargs):
+        self.cancel_typing()
         if self.author.id in self.bot.cache["tips_are_on"]:
             tip = random.choice(
                 [
@@ -53,8 +71,13 @@ class customContext(commands.Context):
 
         return await super().send(content, **kwargs)
 
+    async def reply(self, content=None, **kwargs):
+        self.cancel_typing()
+        return await super().reply(content, **kwargs)
+
     async def maybe_reply(self, content=None, mention_author=False, **kwargs):
         """Replies if there is a message in between the command invoker and the bot's message."""
+        self.cancel_typing()
         await asyncio.sleep(0.05)
         with contextlib.suppress(discord.HTTPException):
             if getattr(self.channel, "last_message", False) != self.message:
@@ -0,0 +1,168 @@
+import asyncio
+import collections
+import itertools
+import json
+import random
+import re
+import time
+
+import wavelink
+
+SEARCH_REGEX = re.compile(r"^(\w+search):(.*)$", flags=re.S)
+
+
+def normalize(query: str):
+    """Key of a query in the cache, searches differing only in case or spacing share it."""
+    query = query.strip().strip("<>")
+    if match := SEARCH_REGEX.match(query):
+        return f"{match.group(1).lower()}:{' '.join(match.group(2).casefold().split())}"
+    return query
+
+
+class TrackCache:
+    """Resolved Lavalink tracks, in front of `wavelink.Client.get_tracks`.
+
+    Results are kept for `ttl` seconds in the "tracks" cache namespace, concurrent
+    lookups of the same query share one request. With `persist` they are also
+    stored in the track_cache table so they survive restarts.
+    """
+
+    def __init__(self, bot, *, maxsize=2000, ttl=6 * 60 * 60, persist=True):
+        self.bot = bot
+        self.ttl = ttl
+        self.persist = persist
+        self.stats = collections.Counter()
+        self.cache = bot.cache.namespace("tracks", maxsize=maxsize, ttl=ttl, loader=self._resolve)
+
+    async def get_tracks(self, query: str):
+        """Same as `wavelink.Client.get_tracks`: a list of tracks, a TrackPlaylist or None."""
+        payload = await self.cache.load(normalize(query))
+        if payload is None:
+            return None
+        return self.build(payload)
+
+    async def invalidate(self, query: str):
+        """Forgets the result of a query, e.g. when its track can no longer be played."""
+        key = normalize(query)
+        self.cache.pop(key, None)
+        if self.persist:
+            await self.bot.db.execute("DELETE FROM track_cache WHERE query = ?", (key,))
+
+    @staticmethod
+    def build(payload):
+        if payload["playlist"]:
+            return wavelink.TrackPlaylist({"playlistInfo": payload["playlist"], "tracks": payload["tracks"]})
+        return [wavelink.Track(track["track"], track["info"]) for track in payload["tracks"]]
+
+    @staticmethod
+    def dump(tracks):
+        if isinstance(tracks, wavelink.TrackPlaylist):
+            return {"playlist": tracks.data["playlistInfo"], "tracks": tracks.data["tracks"]}
+        return {"playlist": None, "tracks": [{"track": track.id, "info": track.info} for track in tracks]}
+
+    async def _resolve(self, key):
+        if self.persist:
+            query = "SELECT payload FROM track_cache WHERE query = ? AND resolved_at > ?"
+            if row := await self.bot.db.fetchone(query, (key, time.time() - self.ttl)):
+                self.stats["database"] += 1
+                return json.loads(row[0])
+
+        self.stats["lavalink"] += 1
+        tracks = await self.bot.wavelink.get_tracks(key)
+        if not tracks:
+            # not cached, it may be a failed request rather than no results
+            self.stats["empty"] += 1
+            return None
+
+        payload = self.dump(tracks)
+        if self.persist:
+            query = "INSERT OR REPLACE INTO track_cache (query, payload, resolved_at) VALUES (?, ?, ?)"
+            await self.bot.db.execute(query, (key, json.dumps(payload, separators=(",", ":")), time.time()))
+        return payload
+
+    async def prune(self):
+        """Deletes the expired rows of track_cache."""
+        if self.persist:
+            await self.bot.db.execute("DELETE FROM track_cache WHERE resolved_at <= ?", (time.time() - self.ttl,))
+
+
+class TrackQueue:
+    """Upcoming tracks of a player, replaces `asyncio.Queue` so it can be inspected and edited.
+
+    Supports indexing and slicing (0 is the next track), removing and moving tracks,
+    and shuffling in place. Tracks taken with `get` are kept in `history`, newest
+    first, and with `loop` set they are also queued again at the end.
+    """
+
+    def __init__(self, history=50):
+        self._queue = collections.deque()
+        self._not_empty = asyncio.Event()
+        self.history = collections.deque(maxlen=history)
+        self.loop = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __bool__(self):
+        return bool(self._queue)
+
+    def __iter__(self):
+        return iter(self._queue)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # only walks the deque up to the end of the slice
+            return list(itertools.islice(self._queue, *index.indices(len(self._queue))))
+        return self._queue[index]
+
+    def put(self, track):
+        self._queue.append(track)
+        self._not_empty.set()
+
+    def extend(self, tracks):
+        self._queue.extend(tracks)
+        if self._queue:
+            self._not_empty.set()
+
+    def peek(self):
+        """Returns the next track without taking it, None if the queue is empty."""
+        return self._queue[0] if self._queue else None
+
+    def get_nowait(self):
+        track = self._queue.popleft()
+        if self.loop:
+            self._queue.append(track)
+        if not self._queue:
+            self._not_empty.clear()
+        self.history.appendleft(track)
+        return track
+
+    async def get(self):
+        """Takes the next track, waiting for one if the queue is empty."""
+        while not self._queue:
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def remove(self, index):
+        """Removes and returns the track at `index`."""
+        track = self._queue[index]
+        del self._queue[index]
+        if not self._queue:
+            self._not_empty.clear()
+        return track
+
+    def move(self, index, destination):
+        """Moves the track at `index` so it ends up at `destination`."""
+        track = self._queue[index]
+        del self._queue[index]
+        self._queue.insert(destination, track)
+        return track
+
+    def shuffle(self):
+        tracks = list(self._queue)
+        random.shuffle(tracks)
+        self._queue = collections.deque(tracks)
+
+    def clear(self):
+        self._queue.clear()
+        self._not_empty.clear()
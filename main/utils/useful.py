@@ -16,6 +16,7 @@ from discord.ext import commands, menus
 from discord.ext.menus import First, Last
 from discord.utils import maybe_coroutine
 from utils.checks import can_execute_action
+from utils.inventory import InventoryCache
 
 
 PAGE_REGEX = r'(Page)?(\s)?((\[)?((?P<current>\d+)/(?P<last>\d+))(\])?)'
@@ -100,9 +101,25 @@ class Embed(discord.Embed):
 class currencyData:
     def __init__(self, bot):
         self.bot = bot
+        self.inventory = InventoryCache(bot)
+
+    async def get_account(self, user_id):
+        """Returns the cached account of a user, loading it if needed. None if there is no account."""
+        return await self.bot.cache["users"].load(user_id)
+
+    async def fetch_account(self, user_id):
+        """Loader of the users cache, unflushed evicted data wins over the database."""
+        if (account := self.bot.flusher.restore(user_id)) is not None:
+            return account
+
+        query = "SELECT wallet, bank, max_bank, boost, exp, lvl, prestige FROM currency_data WHERE user_id = ?"
+        cur = await self.bot.db.execute(query, (user_id,))
+        if (row := await cur.fetchone()) is None:
+            return None
+        return dict(zip(("wallet", "bank", "max_bank", "boost", "exp", "lvl", "prestige"), row))
 
     async def create_account(self, user_id):
-        if user_id in self.bot.cache["users"]:
+        if await self.get_account(user_id) is not None:
             return False
         query = "INSERT INTO currency_data (user_id) VALUES (?)"
         try:
@@ -116,31 +133,30 @@ class currencyData:
                     "boost": 1,
                     "exp": 0,
                     "lvl": 0,
+                    "prestige": 0,
                 },
             )
             return True
         except sqlite3.IntegrityError:
             return False
 
+    async def _account(self, user_id):
+        if (account := await self.get_account(user_id)) is None:
+            raise KeyError(user_id)
+        return account
+
     async def get_data(self, user_id, mode="wallet"):
-        return self.bot.cache["users"][user_id][mode]
+        return (await self._account(user_id))[mode]
 
     async def update_data(self, user_id, amount: int, mode="wallet"):
-        self.bot.cache["users"][user_id][mode] += amount
+        (await self._account(user_id))[mode] += amount
+        self.bot.flusher.mark_user(user_id)
         return True
 
     async def has_item(self, user_id, item):
-        item = item.lower()
-        query = """
-                SELECT item_id
-                FROM user_inventory
-                INNER JOIN item_info
-                USING(item_id)
-                WHERE user_id = ? AND lower(item_name) = ?
-                """
-        cur = await self.bot.db.execute(query, (user_id, item))
-        data = await cur.fetchone()
-        return bool(data)
+        if (item := self.inventory.get_item(item)) is None:
+            return False
+        return await self.inventory.amount(user_id, item.id) > 0
 
 
 class Cooldown:
@@ -245,6 +261,15 @@ def get_title(track, length=35):
         track = f"{track[:length]}..."
     return track
 
+def convert(ms):
+    seconds, milliseconds = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    result = [hours, minutes, seconds]
+    format_result = [f"0{i}" if len(str(i)) == 1 else str(i) for i in result]
+    return ":".join(format_result).removeprefix("00:").removesuffix(":")
+
 def progress_bar(progress):
     progress = round(progress / 10)
     return ("■" * progress) + ("□" * (10 - progress))